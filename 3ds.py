@@ -20,16 +20,14 @@ def make_fake_mesh(ob_name, vertices, faces, mesh: Amsh):
     if mesh.has_uv:
         material = mesh.get_single("NAM2").to_class().name
         olpl = mesh.get_single("OLPL").to_class()  # type: Olpl
-        olpl.normalize()
-        uv_map = olpl.points
+        uv_map = olpl.normalized_points()
     else:
         material = None
         uv_map = None
 
     atts = mesh.get_single("ATTS").to_class()  # type: Atts
-    pop_faces = [i for i in range(len(faces)) if i not in [x["poly_id"] for x in atts.atts_entries]]
-    pop_faces.sort(reverse=True)
-    for idx in pop_faces:
+    pop_faces = atts.polys_without_atts(len(faces)).tolist()
+    for idx in reversed(pop_faces):
         faces.pop(idx)  # Pop face if no UV texture assigned
 
     return FakeBlenderMesh(ob_name=ob_name,
@@ -59,9 +57,8 @@ def area_to_fake_mesh(ob_name, vertices, faces, area: Form):
         otl2 = area.get_single("OTL2")  # type: Form
         otl2 = otl2.to_class()  # type: Otl2
         olpl = Olpl()
-        olpl.points = [otl2.points]
-        olpl.normalize()
-        uv_map = olpl.points
+        olpl.set_uv([0, len(otl2.uv)], otl2.uv)
+        uv_map = olpl.normalized_points()
 
         return FakeBlenderMesh(ob_name=ob_name,
                                vertices=vertices,
@@ -90,12 +87,12 @@ def main():
                      glob.glob("assets/sets/{}/objects/vehicles/*.bas.json".format(set_number)):
         print(file_name)
 
-        model_form = Form().from_json_file(file_name)
+        model_form = Form().from_json_file(file_name).build_index()
         ob_name = os.path.basename(file_name).replace(".bas", "").replace(".json", "")
 
         sklt_file_name = model_form.get_single("SKLC").get_single("NAME").to_class().name[:-1]  # HACK
 
-        sklt_form = Form().from_json_file("./assets/sets/{}/{}.json".format(set_number, sklt_file_name))
+        sklt_form = Form().from_json_file("./assets/sets/{}/{}.json".format(set_number, sklt_file_name)).build_index()
         poo2 = sklt_form.get_single("POO2").to_class()  # type: Poo2
         poo2.scale_down(150)
         poo2.change_coordinate_system()
@@ -257,15 +257,11 @@ class Mesh(object):
             if bytes(sklt_name, "ascii") in chunk.get_data():
                 print("Found ", sklt_name, "in embd")
                 sklt = embd_form.sub_chunks[i + 1]
-                sklt_poo2_data = sklt.get_single("POO2").get_data()
-                poo2 = compile.Poo2()
-                poo2.set_binary_data(sklt_poo2_data)
+                poo2 = sklt.get_single("POO2").to_class()  # type: compile.Poo2
                 vertices = poo2.points_as_list()
                 self.vertices = vertices
 
-                sklt_pol2_data = sklt.get_single("POL2").get_data()
-                pol2 = compile.Pol2()
-                pol2.set_binary_data(sklt_pol2_data)
+                pol2 = sklt.get_single("POL2").to_class()  # type: compile.Pol2
                 edges = pol2.edges
                 self.edges = edges
 
@@ -279,15 +275,11 @@ class Mesh(object):
 
         sklt = compile.Form().load_from_file(file_path)
 
-        sklt_poo2_data = sklt.get_single("POO2").get_data()
-        poo2 = compile.Poo2()
-        poo2.set_binary_data(sklt_poo2_data)
+        poo2 = sklt.get_single("POO2").to_class()  # type: compile.Poo2
         vertices = poo2.points_as_list()
         self.vertices = vertices
 
-        sklt_pol2_data = sklt.get_single("POL2").get_data()
-        pol2 = compile.Pol2()
-        pol2.set_binary_data(sklt_pol2_data)
+        pol2 = sklt.get_single("POL2").to_class()  # type: compile.Pol2
         edges = pol2.edges
         self.edges = edges
 
@@ -508,7 +500,7 @@ class Example(QtWidgets.QMainWindow):
         urls = event.mimeData().urls()
         if len(urls) == 1:
             file_name = str(urls[0].toLocalFile())
-            self.top_level_form.load_from_file(file_name)
+            self.top_level_form.load_from_file(file_name).build_index()
             self.refresh_tree_widget()
             self.file_changed = False
             self.setWindowTitle(self.default_windows_title + " " + file_name)
@@ -988,7 +980,7 @@ class Example(QtWidgets.QMainWindow):
             file_extension = str(filename).lower()[-4:]
             if file_extension in [".bas", ".anm", ".ilb", ".skl"]:
                 print("adding BAS top_level_item to tree_widget")
-                self.top_level_form.load_from_file(filename)
+                self.top_level_form.load_from_file(filename).build_index()
             else:
                 self.update_status("You must select a file that ends with with .bas")
                 return
@@ -1045,17 +1037,13 @@ class Example(QtWidgets.QMainWindow):
             pol2_list = []
 
             if vertices:
-                vertices_data = vertices.get_data()
                 print(vertices, edges)
 
-                poo2 = compile.Poo2()
-                poo2.set_binary_data(vertices_data)
-                poo2_list = [(point["x"], point["y"], point["z"]) for point in poo2.points]
+                poo2 = vertices.to_class()  # type: compile.Poo2
+                poo2_list = [tuple(point) for point in poo2.points_as_list()]
 
             if edges:
-                edges_data = edges.get_data()
-                pol2 = compile.Pol2()
-                pol2.set_binary_data(edges_data)
+                pol2 = edges.to_class()  # type: compile.Pol2
                 pol2_list = pol2.edges
 
             new_mesh = Mesh()
@@ -1101,7 +1089,7 @@ class Example(QtWidgets.QMainWindow):
 
                         atts = compile.Atts()
                         atts.set_binary_data(atts_data)
-                        atts_pols = [x["poly_id"] for x in atts.atts_entries]
+                        atts_pols = atts.poly_ids().tolist()
 
                         olpl = compile.Olpl()
                         olpl.set_binary_data(olpl_data)
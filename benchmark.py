@@ -0,0 +1,748 @@
+import collections
+import concurrent.futures
+import gc
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy
+
+# A baseline run (see run_baseline) imports compile.py and myjson.py as of another revision
+if os.environ.get("BENCHMARK_BASELINE_DIR"):
+    sys.path.insert(0, os.environ["BENCHMARK_BASELINE_DIR"])
+
+import compile
+import migrate_json
+
+
+def set_names():
+    return sorted(os.path.basename(x)[3:] for x in glob.glob(os.path.join("assets", "sets", "set*")))
+
+
+def compiled_set_files():
+    """
+    Compiles every set in assets/sets that has not been compiled yet and returns the paths of the compiled .bas files
+    """
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    files = []
+    for set_number in set_names():
+        path = os.path.join("output", "set{}_compiled.bas".format(set_number))
+        if not os.path.isfile(path):
+            compile.compile_set_bas(set_number)
+        files.append(path)
+    return files
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """
+    Runs func repeat times for the best wall time and once more under tracemalloc for peak memory
+
+    :return: (seconds, peak bytes, result)
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = min(seconds, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def bench_parse():
+    print("{:<32} {:>10} {:>10} {:>12}".format("file", "size KiB", "parse ms", "peak KiB"))
+    total_seconds = 0.0
+    for path in compiled_set_files():
+        seconds, peak, _ = measure(compile.Form().load_from_file, path)
+        total_seconds += seconds
+        print("{:<32} {:>10.0f} {:>10.1f} {:>12.0f}".format(path, os.path.getsize(path) / 1024,
+                                                            seconds * 1000, peak / 1024))
+    print("total parse time: {:.1f} ms".format(total_seconds * 1000))
+
+
+def bench_lazy():
+    print("{:<32} {:>12} {:>12} {:>16}".format("file", "eager ms", "lazy ms", "lazy + 1 SKLT ms"))
+    for path in compiled_set_files():
+        eager = measure(compile.Form().load_from_file, path)[0]
+        lazy, _, form = measure(compile.Form().load_from_file, path, lazy=True)
+        form.close()
+
+        def lazy_single():
+            with compile.Form().load_from_file(path, lazy=True) as lazy_form:
+                return lazy_form.get_single("SKLT").full_data()
+
+        single = measure(lazy_single)[0]
+        print("{:<32} {:>12.1f} {:>12.2f} {:>16.2f}".format(path, eager * 1000, lazy * 1000, single * 1000))
+
+
+def bench_save():
+    print("{:<32} {:>12} {:>14}".format("file", "save ms", "save peak KiB"))
+    for path in compiled_set_files():
+        form = compile.Form().load_from_file(path)
+        seconds, peak, _ = measure(form.save_to_file, os.path.join("output", "bench_save.bas"))
+        print("{:<32} {:>12.1f} {:>14.0f}".format(path, seconds * 1000, peak / 1024))
+    os.remove(os.path.join("output", "bench_save.bas"))
+
+
+def bench_patch():
+    print("{:<32} {:>12} {:>14} {:>14}".format("file", "full ms", "patch ms", "lazy patch ms"))
+    save_path = os.path.join("output", "bench_save.bas")
+    for path in compiled_set_files():
+        def full():
+            form = compile.Form().load_from_file(path)
+            forms = [form]
+            for f in forms:
+                forms.extend(c for c in f.sub_chunks if isinstance(c, compile.Form))
+                f.mark_dirty()
+            form.get_single("NAME").data = b"RENAMED\x00"
+            form.save_to_file(save_path)
+
+        def patch(lazy):
+            form = compile.Form().load_from_file(path, lazy=lazy)
+            form.get_single("NAME").data = b"RENAMED\x00"
+            form.save_to_file(save_path)
+
+        full_seconds = measure(full)[0]
+        patch_seconds = measure(patch, False)[0]
+        lazy_seconds = measure(patch, True)[0]
+        print("{:<32} {:>12.1f} {:>14.1f} {:>14.1f}".format(path, full_seconds * 1000, patch_seconds * 1000,
+                                                            lazy_seconds * 1000))
+    os.remove(save_path)
+
+
+def bench_scan():
+    print("{:<32} {:>10} {:>12} {:>10} {:>12}".format("file", "parse ms", "parse KiB", "scan ms", "scan KiB"))
+    for path in compiled_set_files():
+        def count_parsed():
+            counts = collections.Counter()
+            forms = [compile.Form().load_from_file(path)]
+            for form in forms:
+                for c in form.sub_chunks:
+                    if isinstance(c, compile.Form):
+                        counts[c.form_type] += 1
+                        forms.append(c)
+                    else:
+                        counts[c.chunk_id] += 1
+            return counts
+
+        def count_scanned():
+            return collections.Counter(ckid for _, _, ckid, _, _, _ in compile.iter_chunks(path))
+
+        parse_seconds, parse_peak, _ = measure(count_parsed)
+        scan_seconds, scan_peak, _ = measure(count_scanned)
+        print("{:<32} {:>10.1f} {:>12.0f} {:>10.1f} {:>12.0f}".format(path, parse_seconds * 1000, parse_peak / 1024,
+                                                                      scan_seconds * 1000, scan_peak / 1024))
+
+
+def bench_toc():
+    print("{:<32} {:>10} {:>12} {:>10} {:>12}".format("file", "parse ms", "parse KiB", "seek ms", "seek KiB"))
+    for path in compiled_set_files():
+        if not os.path.isfile(path + ".toc"):
+            compile.write_set_toc(path)
+        name = compile.open_set(path).names("vehicle")[-1]
+
+        def parsed_vehicle():
+            form = compile.Form().load_from_file(path)
+            for name_chunk in form.get_all("NAME"):
+                if name_chunk.to_class().name == name:
+                    return name_chunk
+
+        parse_seconds, parse_peak, _ = measure(parsed_vehicle)
+        seek_seconds, seek_peak, _ = measure(lambda: compile.open_set(path).get_vehicle(name))
+        print("{:<32} {:>10.1f} {:>12.0f} {:>10.1f} {:>12.0f}".format(path, parse_seconds * 1000, parse_peak / 1024,
+                                                                      seek_seconds * 1000, seek_peak / 1024))
+
+
+def node_bytes(node):
+    """
+    Size of the node object itself, including its __dict__ when it has one
+    """
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def bench_memory():
+    files = sorted(glob.glob(os.path.join("assets", "sets", "**", "*.bas.json"), recursive=True))
+    print("{} files".format(len(files)))
+    print("{:<8} {:>10} {:>14} {:>14} {:>16} {:>10}".format("mode", "nodes", "retained MiB", "bytes/node",
+                                                           "object bytes/node", "load s"))
+    for intern in (False, True):
+        compile.interner = compile.Interner()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        forms = [compile.Form().from_json_file(path, intern=intern) for path in files]
+        seconds = time.perf_counter() - start
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Shared nodes count once per place they are used, but their memory only once
+        nodes = 0
+        object_bytes = 0
+        seen = set()
+        pending = list(forms)
+        while pending:
+            node = pending.pop()
+            nodes += 1
+            if id(node) not in seen:
+                seen.add(id(node))
+                object_bytes += node_bytes(node)
+            if isinstance(node, compile.Form):
+                pending.extend(node.sub_chunks)
+
+        print("{:<8} {:>10} {:>14.1f} {:>14.0f} {:>16.0f} {:>10.1f}".format(
+            "intern" if intern else "plain", nodes, retained / 1024 / 1024, retained / nodes, object_bytes / nodes,
+            seconds))
+        if intern:
+            print("interner: {}".format(compile.interner.report()))
+        del forms
+
+    print("{:<8} {:>12}".format("class", "object bytes"))
+    classes = set(compile.master_list.values()) | {compile.Chunk, compile.Form}
+    for cls in sorted(classes, key=lambda x: x.__name__):
+        print("{:<8} {:>12}".format(cls.__name__, node_bytes(cls())))
+
+
+def bench_verify():
+    path = compiled_set_files()[0]
+    form = compile.Form().load_from_file(path)
+    chunks = []
+    forms = [form]
+    for f in forms:
+        for child in f.sub_chunks:
+            if isinstance(child, compile.Form):
+                forms.append(child)
+            elif child.chunk_id in compile.master_list:
+                chunks.append(child)
+    print("decoding every chunk of {}".format(path))
+    print("{:<8} {:>10} {:>10} {:>10}".format("policy", "ms", "decoded", "checked"))
+    for policy in compile.RoundTripVerifier.policies:
+        def decode():
+            verifier = compile.RoundTripVerifier(policy)
+            for chunk in chunks:
+                chunk.to_class(verifier)
+            return verifier
+
+        seconds, _, verifier = measure(decode)
+        print("{:<8} {:>10.1f} {:>10} {:>10}".format(policy, seconds * 1000, verifier.decoded, verifier.checked))
+
+
+def bench_views():
+    print("{:<24} {:>10} {:>10} {:>10} {:>10}".format("job", "ms", "hits", "misses", "hit rate"))
+
+    def report(job, func, *args):
+        compile.view_cache.reset()
+        start = time.perf_counter()
+        func(*args)
+        seconds = time.perf_counter() - start
+        stats = compile.view_cache
+        print("{:<24} {:>10.1f} {:>10} {:>10} {:>9.1f}%".format(job, seconds * 1000, stats.hits, stats.misses,
+                                                                stats.hit_rate() * 100))
+
+    report("compile_set_bas 1", compile.compile_set_bas, "1")
+
+    def export_meshes(form):
+        # What 3ds.py and the GUI ask of every AMSH of a set
+        for amsh in form.get_all("AMSH"):
+            amsh = amsh.to_class()
+            if amsh.has_uv:
+                amsh.get_texture_name
+                amsh.get_uv_mapping
+            amsh.get_polys
+
+    set_form = compile.Form().load_from_file(compiled_set_files()[0])
+    report("export set1 meshes", export_meshes, set_form)
+    report("export them again", export_meshes, set_form)
+
+
+def bench_skeleton():
+    # What import_sklt.readSklt does with the points of every skeleton in a set
+    set_form = compile.Form().load_from_file(compiled_set_files()[0])
+    chunks = set_form.get_all("POO2") + set_form.get_all("SEN2")
+    points = sum(len(chunk.get_data()) // 12 for chunk in chunks)
+    typed = []
+
+    def decode():
+        typed[:] = [chunk.to_class() for chunk in chunks]
+
+    def transform():
+        for poo2 in typed:
+            poo2.scale_down(150)
+            poo2.change_coordinate_system()
+
+    def as_list():
+        for poo2 in typed:
+            poo2.points_as_list()
+
+    def encode():
+        for poo2 in typed:
+            poo2.get_data()
+
+    pol2_chunks = set_form.get_all("POL2")
+    pol2_typed = []
+
+    def decode_pol2():
+        pol2_typed[:] = [chunk.to_class() for chunk in pol2_chunks]
+
+    def encode_pol2():
+        for pol2 in pol2_typed:
+            pol2.get_data()
+
+    print("{} chunks, {} points, {} POL2".format(len(chunks), points, len(pol2_chunks)))
+    print("{:<24} {:>10}".format("step", "ms"))
+    for name, func in [("decode", decode), ("scale + swap axes", transform), ("points_as_list", as_list),
+                       ("encode", encode), ("decode POL2", decode_pol2), ("encode POL2", encode_pol2)]:
+        print("{:<24} {:>10.1f}".format(name, measure(func)[0] * 1000))
+
+
+def bench_uv():
+    # What 3ds.py and the GUI texture path do with the UVs of every textured mesh in a set
+    set_form = compile.Form().load_from_file(compiled_set_files()[0])
+    olpl_chunks = set_form.get_all("OLPL")
+    otl2_chunks = set_form.get_all("OTL2")
+    olpls, otl2s = [], []
+
+    def decode():
+        olpls[:] = [chunk.to_class() for chunk in olpl_chunks]
+        otl2s[:] = [chunk.to_class() for chunk in otl2_chunks]
+
+    def normalized_points():
+        for olpl in olpls:
+            olpl.normalized_points()
+
+    def as_floats():
+        for olpl in olpls:
+            olpl.as_floats()
+
+    def encode():
+        for chunk in olpls + otl2s:
+            chunk.get_data()
+
+    print("{} OLPL, {} OTL2".format(len(olpl_chunks), len(otl2_chunks)))
+    print("{:<24} {:>10}".format("step", "ms"))
+    for name, func in [("decode", decode), ("normalized_points", normalized_points), ("as_floats", as_floats),
+                       ("encode", encode)]:
+        print("{:<24} {:>10.1f}".format(name, measure(func)[0] * 1000))
+
+
+def bench_atts():
+    # make_fake_mesh and Amsh.get_polys for every ATTS of a set
+    set_form = compile.Form().load_from_file(compiled_set_files()[0])
+    atts_chunks = set_form.get_all("ATTS")
+    typed = []
+
+    def decode():
+        typed[:] = [chunk.to_class() for chunk in atts_chunks]
+
+    def poly_lookup():
+        for atts in typed:
+            if not atts.is_particle_atts:
+                # As 3ds.make_fake_mesh used to do it
+                [i for i in range(64) if i not in [x["poly_id"] for x in atts.atts_entries]]
+
+    def poly_lookup_vectorized():
+        for atts in typed:
+            if not atts.is_particle_atts:
+                atts.polys_without_atts(64)
+
+    def encode():
+        for atts in typed:
+            atts.get_data()
+
+    print("{} ATTS".format(len(atts_chunks)))
+    print("{:<24} {:>10}".format("step", "ms"))
+    steps = [("decode", decode), ("encode", encode), ("poly lookup (dicts)", poly_lookup)]
+    if hasattr(compile.Atts, "polys_without_atts"):
+        steps.append(("poly lookup (arrays)", poly_lookup_vectorized))
+    for name, func in steps:
+        print("{:<24} {:>10.1f}".format(name, measure(func)[0] * 1000))
+
+
+def bench_vanm():
+    set_form = compile.Form().load_from_file(compiled_set_files()[0])
+    data_chunks = [chunk for chunk in set_form.get_all("DATA") if chunk.to_class().__class__ is compile.Data]
+    typed = []
+
+    def decode():
+        typed[:] = [chunk.to_class() for chunk in data_chunks]
+
+    def encode():
+        return sum(len(data.get_data()) for data in typed)
+
+    print("{} DATA, {} bytes in the set".format(len(data_chunks), sum(chunk.size() for chunk in data_chunks)))
+    print("{:<24} {:>10}".format("step", "ms"))
+    print("{:<24} {:>10.1f}".format("decode", measure(decode)[0] * 1000))
+    seconds, _, size = measure(encode)
+    print("{:<24} {:>10.1f}".format("encode", seconds * 1000))
+    print("{} bytes after encoding".format(size))
+
+
+def bench_strc():
+    print("{:<32} {:>8} {:>12} {:>12} {:>12}".format("file", "STRC", "decode ms", "encode ms", "columns ms"))
+    for path in compiled_set_files():
+        set_form = compile.Form().load_from_file(path)
+        strc_chunks = set_form.get_all("STRC", max_count=sys.maxsize)
+        decode = measure(lambda: [chunk.to_class() for chunk in strc_chunks])
+        typed = decode[2]
+        encode = measure(lambda: [strc.get_data() for strc in typed])
+        columns = measure(compile.strc_columns, set_form)[0] * 1000 if hasattr(compile, "strc_columns") else 0
+        print("{:<32} {:>8} {:>12.1f} {:>12.1f} {:>12.1f}".format(path, len(strc_chunks), decode[0] * 1000,
+                                                                  encode[0] * 1000, columns))
+
+
+def asset_chunks():
+    """
+    Raw data of every typed chunk in the JSON assets of all sets, by chunk id
+
+    :rtype: dict[str, list[bytes]]
+    """
+    chunks = collections.defaultdict(list)
+
+    def walk(form):
+        for child in form.sub_chunks:
+            if isinstance(child, compile.Form):
+                walk(child)
+            elif child.chunk_id in compile.master_list:
+                chunks[child.chunk_id].append(bytes(child.get_data()))
+
+    for file_name in sorted(glob.glob(os.path.join("assets", "sets", "*", "**", "*.json"), recursive=True)):
+        try:
+            walk(compile.Form().from_json_file(file_name))
+        except (ValueError, KeyError):
+            continue
+    return chunks
+
+
+def bench_codecs():
+    chunks = asset_chunks()
+    print("{:<8} {:>8} {:>12} {:>12}".format("chunk", "count", "decode ms", "encode ms"))
+    total_decode = total_encode = 0
+    verifier = compile.RoundTripVerifier("off")
+    for chunk_id in sorted(chunks):
+        cls = compile.master_list[chunk_id]
+        datas = chunks[chunk_id]
+        typed = []
+
+        def decode():
+            typed[:] = []
+            for data in datas:
+                c = cls()
+                c.set_binary_data(data, verifier)
+                typed.append(c)
+
+        def encode():
+            for c in typed:
+                c.get_data()
+
+        decode_seconds = measure(decode)[0]
+        encode_seconds = measure(encode)[0]
+        total_decode += decode_seconds
+        total_encode += encode_seconds
+        print("{:<8} {:>8} {:>12.1f} {:>12.1f}".format(chunk_id, len(datas), decode_seconds * 1000,
+                                                      encode_seconds * 1000))
+    print("{:<8} {:>8} {:>12.1f} {:>12.1f}".format("total", sum(map(len, chunks.values())), total_decode * 1000,
+                                                  total_encode * 1000))
+
+
+def bench_dump():
+    # Writing a whole compiled set as JSON, all at once versus streamed by save_to_json_file
+    print("{:<28} {:>10} {:>10} {:>12} {:>10} {:>12} {:>12}".format(
+        "file", "JSON KiB", "dump ms", "dump peak KiB", "stream ms", "stream peak KiB", "leaf KiB"))
+    for file_name in compiled_set_files()[:4]:
+        form = compile.Form().load_from_file(file_name)
+        json_size = [0]
+
+        def dump():
+            with open(os.devnull, "wt") as f:
+                json_size[0] = f.write(form.to_json())
+
+        def stream():
+            form.save_to_json_file(os.devnull)
+
+        dump_seconds, dump_peak, _ = measure(dump, repeat=1)
+        stream_seconds, stream_peak, _ = measure(stream, repeat=1)
+        largest_leaf = 0
+        forms = [form]
+        while forms:
+            for child in forms.pop().sub_chunks:
+                if isinstance(child, compile.Form):
+                    forms.append(child)
+                else:
+                    largest_leaf = max(largest_leaf, len(compile.json.dumps(child.to_dict(), indent=2)))
+        print("{:<28} {:>10} {:>10.1f} {:>12} {:>10.1f} {:>12} {:>12}".format(
+            os.path.basename(file_name), json_size[0] // 1024, dump_seconds * 1000, dump_peak // 1024,
+            stream_seconds * 1000, stream_peak // 1024, largest_leaf // 1024))
+
+
+def bench_floats():
+    # Every JSON asset decompiled again from its binary form, as is and with the skeletons scaled by 1/3 like an
+    # import leaves them, written once with widened floats and once with the shortest float32 decimals
+    forms = []
+    for file_name in sorted(glob.glob(os.path.join("assets", "sets", "*", "**", "*.json"), recursive=True)):
+        try:
+            form = compile.Form().from_json_file(file_name)
+        except (ValueError, KeyError):
+            continue
+        if isinstance(form, compile.Form):
+            forms.append(form.full_data())
+    rescaled = []
+    for data in forms:
+        form = compile.Form().parse_buffer(data)[0]
+        for chunk in form.get_all("POO2", max_count=sys.maxsize) + form.get_all("SEN2", max_count=sys.maxsize):
+            chunk.view().scale_down(3)
+        rescaled.append(form.full_data())
+
+    shortest = compile.float32_tolist
+    widened = lambda values: numpy.asarray(values, numpy.float32).tolist()
+    print("{} files".format(len(forms)))
+    print("{:<10} {:<10} {:>10} {:>10} {:>10} {:>10}".format("assets", "floats", "KiB", "dump ms", "loads ms",
+                                                            "recompile"))
+    for name, datas in (("as is", forms), ("rescaled", rescaled)):
+        for label, tolist in (("widened", widened), ("shortest", shortest)):
+            compile.float32_tolist = tolist
+            start = time.perf_counter()
+            try:
+                texts = [compile.Form().parse_buffer(data)[0].to_class().to_json() for data in datas]
+            finally:
+                compile.float32_tolist = shortest
+            dump_seconds = time.perf_counter() - start
+            gc.collect()
+            start = time.perf_counter()
+            for text in texts:
+                compile.json.loads(text)
+            loads_seconds = time.perf_counter() - start
+            same = sum(compile.Form().from_json(text).full_data() == data for text, data in zip(texts, datas))
+            print("{:<10} {:<10} {:>10} {:>10.1f} {:>10.1f} {:>10}".format(
+                name, label, sum(map(len, texts)) // 1024, dump_seconds * 1000, loads_seconds * 1000,
+                "{}/{}".format(same, len(datas))))
+
+
+def bench_json():
+    # Compiling the JSON sources of all sets as they are, version 1, and migrated to version 2
+    groups = collections.defaultdict(list)
+    for file_name in sorted(glob.glob(os.path.join("assets", "sets", "*", "**", "*.json"), recursive=True)):
+        with open(file_name, "r") as f:
+            groups[file_name.split(os.sep)[3]].append(f.read())
+
+    print("{:<10} {:>6} {:>8} {:>10} {:>10} {:>12} {:>10}".format("assets", "files", "version", "KiB", "loads ms",
+                                                                 "compile ms", "same"))
+    for name, texts in sorted(groups.items()):
+        compiled = None
+        for version in (1, 2):
+            if version != 1:
+                texts = [migrate_json.convert(text, version) for text in texts]
+            gc.collect()
+            start = time.perf_counter()
+            dicts = [compile.json.loads(text) for text in texts]
+            loads_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            datas = [compile.Form().from_json(json_dict).full_data() for json_dict in dicts]
+            compile_seconds = time.perf_counter() - start
+            compiled = compiled or datas
+            same = sum(a == b for a, b in zip(datas, compiled))
+            # Release this version before timing the next one, live objects slow down the garbage collector
+            del dicts, datas
+            print("{:<10} {:>6} {:>8} {:>10} {:>10.1f} {:>12.1f} {:>10}".format(
+                name, len(texts), version, sum(map(len, texts)) // 1024, loads_seconds * 1000,
+                compile_seconds * 1000, same))
+
+
+def bench_diff():
+    files = compiled_set_files()
+    pairs = [(x, x.replace("_compiled", "_xp_compiled")) for x in files if "_xp_" not in x]
+    print("{:<28} {:>10} {:>10} {:>10} {:>10}".format("set", "bytes ms", "diff ms", "again ms", "changes"))
+    for path_a, path_b in pairs:
+        a = compile.Form().load_from_file(path_a)
+        b = compile.Form().load_from_file(path_b)
+
+        start = time.perf_counter()
+        a.full_data() == b.full_data()
+        compare_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        changes = compile.diff(a, b)
+        diff_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compile.diff(a, b)
+        again_seconds = time.perf_counter() - start
+        print("{:<28} {:>10.1f} {:>10.1f} {:>10.1f} {:>10}".format(os.path.basename(path_a) + " vs xp",
+                                                                  compare_seconds * 1000, diff_seconds * 1000,
+                                                                  again_seconds * 1000, len(changes)))
+
+
+def bench_freeze(jobs=4):
+    path = compiled_set_files()[0]
+    form = compile.Form().load_from_file(path)
+    print("{} jobs searching {} for NAME chunks".format(jobs, path))
+
+    def search(job_form):
+        return len(job_form.get_all("NAME"))
+
+    def copies():
+        # Without snapshots every job needs its own tree
+        data = form.full_data()
+        with concurrent.futures.ThreadPoolExecutor(jobs) as pool:
+            return list(pool.map(search, [compile.Form().parse_buffer(data)[0] for _ in range(jobs)]))
+
+    def shared():
+        snapshot = form.freeze()
+        with concurrent.futures.ThreadPoolExecutor(jobs) as pool:
+            return list(pool.map(search, [snapshot] * jobs))
+
+    print("{:<28} {:>10} {:>12}".format("", "ms", "peak KiB"))
+    for name, func in (("one copy per job", copies), ("one shared snapshot", shared)):
+        seconds, peak, _ = measure(func)
+        print("{:<28} {:>10.1f} {:>12.0f}".format(name, seconds * 1000, peak / 1024))
+
+    snapshot = form.freeze()
+
+    def edit():
+        draft = snapshot.thaw()
+        objt = draft.thaw_child(0)
+        base = objt.thaw_child(1)
+        base.add_chunk(compile.Chunk("TEST"))
+        return draft.freeze()
+
+    seconds, peak, _ = measure(edit)
+    print("{:<28} {:>10.1f} {:>12.0f}".format("thaw, edit and freeze", seconds * 1000, peak / 1024))
+
+
+def bench_index():
+    lookups = ["EMBD", "OBJT", "STRC", "NAME", "VBMP", "NONE"]
+    print("{:<32} {:>14} {:>14} {:>12}".format("file", "walk us/op", "index us/op", "build ms"))
+    for path in compiled_set_files():
+        form = compile.Form().load_from_file(path)
+
+        def lookup():
+            for ckid in lookups:
+                form.get_single(ckid)
+                form.get_all(ckid)
+
+        walk = measure(lookup)[0]
+        build = measure(form.build_index)[0]
+        indexed = measure(lookup)[0]
+        print("{:<32} {:>14.1f} {:>14.1f} {:>12.1f}".format(path, walk * 1e6 / len(lookups) / 2,
+                                                            indexed * 1e6 / len(lookups) / 2, build * 1000))
+
+
+def adversarial_inputs():
+    nested = b""
+    for _ in range(20000):
+        nested = b"FORM" + (len(nested) + 4).to_bytes(4, "big") + b"DEEP" + nested
+    many = b"NONE\x00\x00\x00\x00" * 1000000
+    return [
+        ("huge size field", b"FORM\xff\xff\xff\xf0TEST" + b"NAME\xff\xff\xff\xe0abcd"),
+        ("20000 nested forms", nested),
+        ("1M empty chunks", b"FORM" + (len(many) + 4).to_bytes(4, "big") + b"MANY" + many),
+    ]
+
+
+def bench_strict():
+    limits = compile.ParseLimits()
+    print("{:<32} {:>10} {:>10} {:>12} {:>12}".format("file", "parse ms", "strict ms", "peak KiB", "strict KiB"))
+    for path in compiled_set_files():
+        with open(path, "rb") as f:
+            data = f.read()
+        parse = measure(compile.Form().parse_buffer, data)
+        strict = measure(compile.Form().parse_buffer, data, limits=limits)
+        print("{:<32} {:>10.1f} {:>10.1f} {:>12.0f} {:>12.0f}".format(path, parse[0] * 1000, strict[0] * 1000,
+                                                                      parse[1] / 1024, strict[1] / 1024))
+
+    def outcome(data, **kwargs):
+        try:
+            compile.Form().parse_buffer(data, **kwargs)
+            return "parsed"
+        except Exception as e:
+            return type(e).__name__
+
+    print("{:<22} {:>16} {:>10} {:>12} {:>16} {:>10} {:>12}".format(
+        "input", "parse", "ms", "peak KiB", "strict", "ms", "peak KiB"))
+    for name, data in adversarial_inputs():
+        parse = measure(outcome, data, repeat=1)
+        strict = measure(outcome, data, repeat=1, limits=limits)
+        print("{:<22} {:>16} {:>10.1f} {:>12.0f} {:>16} {:>10.1f} {:>12.0f}".format(
+            name, parse[2], parse[0] * 1000, parse[1] / 1024, strict[2], strict[0] * 1000, strict[1] / 1024))
+
+
+def run_baseline(revision, name):
+    """
+    Runs the benchmark name in a separate process against compile.py and myjson.py as of the git revision
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for file_name in ("compile.py", "myjson.py"):
+            source = subprocess.run(["git", "show", "{}:{}".format(revision, file_name)], check=True,
+                                    stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.realpath(__file__))).stdout
+            with open(os.path.join(directory, file_name), "wb") as f:
+                f.write(source)
+        env = dict(os.environ, BENCHMARK_BASELINE_DIR=directory)
+        subprocess.run([sys.executable, os.path.abspath(__file__), name], env=env)
+
+
+benchmarks = {
+    "atts": bench_atts,
+    "codecs": bench_codecs,
+    "diff": bench_diff,
+    "dump": bench_dump,
+    "floats": bench_floats,
+    "freeze": bench_freeze,
+    "index": bench_index,
+    "json": bench_json,
+    "lazy": bench_lazy,
+    "memory": bench_memory,
+    "parse": bench_parse,
+    "patch": bench_patch,
+    "save": bench_save,
+    "scan": bench_scan,
+    "skeleton": bench_skeleton,
+    "strc": bench_strc,
+    "strict": bench_strict,
+    "toc": bench_toc,
+    "vanm": bench_vanm,
+    "uv": bench_uv,
+    "verify": bench_verify,
+    "views": bench_views,
+}
+
+
+if __name__ == "__main__":
+    # benchmark.py [--baseline REVISION] [name ...]
+    # With --baseline every benchmark runs against REVISION first, then against the working tree
+    logging_level = compile.logging.WARNING
+    compile.logging.getLogger().setLevel(logging_level)
+
+    names = sys.argv[1:]
+    baseline = None
+    if names[:1] == ["--baseline"]:
+        baseline, names = names[1], names[2:]
+
+    for name in names or sorted(benchmarks):
+        if os.environ.get("BENCHMARK_BASELINE_DIR"):
+            # The baseline half of a --baseline run, the revision may lack what the benchmark uses
+            try:
+                benchmarks[name]()
+            except (AttributeError, TypeError) as e:
+                print("not available in this revision: {}".format(e))
+            continue
+        if baseline:
+            print("== {} ({}) ==".format(name, baseline), flush=True)
+            run_baseline(baseline, name)
+            print("== {} (working tree) ==".format(name))
+        else:
+            print("== {} ==".format(name))
+        benchmarks[name]()
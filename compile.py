@@ -1,19 +1,29 @@
 import base64
+import contextlib
+import functools
+import gc
 import glob
+import hashlib
 import io
 import logging
+import mmap
+import operator
 import os
 import shutil
 import struct
 import sys
+import weakref
+import numpy
 from typing import Union, List
 
 from PyQt5 import QtGui
 
 try:
     import myjson as json
+    from myjson import LazyList
 except ImportError:
     import json
+    LazyList = None  # Without myjson Form.to_lazy_dict builds the whole dict
 
 logging.basicConfig(level=logging.INFO)
 
@@ -60,6 +70,32 @@ class InvalidImage(Exception):
     pass
 
 
+class ParseError(ValueError):
+    """
+    Raised for malformed IFF data, offset is where in the input the problem was found.
+    Strict parsing checks everything, the default parse only rejects a chunk header cut short by the end of the data.
+    """
+    def __init__(self, message, offset):
+        super().__init__("%s at offset %i" % (message, offset))
+        self.offset = offset
+
+
+class ParseLimits(object):
+    """
+    Bounds for parsing untrusted IFF data, see Form.parse_buffer.
+    A parsed node costs a few hundred bytes, so max_chunks together with max_bytes bounds the memory a parse can use.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_depth=64, max_chunks=500000):
+        if max_depth >= sys.getrecursionlimit() - 100:
+            raise ValueError("max_depth must stay well below the recursion limit")
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.max_chunks = max_chunks
+
+
+default_limits = ParseLimits()
+
+
 class Meshy(object):
     """
     ### A `Meshy` object contains exactly
@@ -78,10 +114,420 @@ class Meshy(object):
         pass
 
 
-class Chunk(object):
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Parsing allocates tens of thousands of nodes at once. The collector runs every few hundred allocations and
+    traverses everything built so far, without ever finding anything to free (trees hold no reference cycles).
+    Pause it while a tree is being built.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class RoundTripVerifier(object):
+    """
+    Decides whether typed chunks encode what they just decoded back to the same bytes.
+    off never checks, sample checks one decode in every sample_rate and full checks all of them.
+    Pass one as verifier to set_binary_data, to_class or view, decodes without one use round_trip.
+    Mismatches are counted and passed to callback(chunk, binary_data, encoded) instead of aborting the decode,
+    without a callback they are logged.
+    """
+    policies = ("off", "sample", "full")
+
+    def __init__(self, policy="full", sample_rate=100, callback=None):
+        if policy not in self.policies:
+            raise ValueError("policy must be one of %s. Supplied policy was %s" % (self.policies, policy))
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be at least 1. Supplied sample_rate was %s" % sample_rate)
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.callback = callback
+        self.decoded = 0
+        self.checked = 0
+        self.mismatches = 0
+
+    def verify(self, chunk, binary_data, prefix=False):
+        """
+        Called at the end of set_binary_data. With prefix=True binary_data only has to start with the encoding.
+
+        :rtype: bool
+        """
+        self.decoded += 1
+        if self.policy == "off" or (self.policy == "sample" and self.decoded % self.sample_rate):
+            return True
+
+        self.checked += 1
+        encoded = chunk.get_data()
+        if prefix:
+            binary_data = binary_data[0:len(encoded)]
+        if binary_data == encoded:
+            return True
+
+        self.mismatches += 1
+        if self.callback is None:
+            logging.warning("%s did not encode back to the %i bytes it was decoded from", chunk.chunk_id,
+                            len(binary_data))
+        else:
+            self.callback(chunk, binary_data, encoded)
+        return False
+
+
+# The verifier of every decode that is not given one of its own. Pass a RoundTripVerifier to set_binary_data,
+# to_class or view for another policy or separate counts, this one is shared by all threads.
+round_trip = RoundTripVerifier()
+
+
+# Version 1 has an object per point, ATTS entry and VANM frame. Version 2 stores POO2/SEN2 points as one x, y, z list,
+# POL2 polygons as counts and indices, OLPL/OTL2 UVs as flat lists, ATTS entries as one list per field and VANM frames
+# as tables of names and polygons with indices into them. from_json() reads both, they compile to the same bytes.
+json_versions = (1, 2)
+
+
+def check_json_version(version):
+    """
+    :raises ValueError: if version is not one of json_versions
+    :rtype: int
+    """
+    if version not in json_versions:
+        raise ValueError("version must be one of %s. Supplied version was %s" % (json_versions, version))
+    return version
+
+
+def iter_chunks(path_or_buffer):
+    """
+    Walks IFF data without building a tree and yields (depth, path, id, is_form, offset, size) for every Form and
+    Chunk in document order. path is the tuple of form types above the entry, id is the form type of a Form and the
+    chunk id of a Chunk, offset points at the FORM/chunk id in the data and size is the size stored after it.
+    A file name is memory mapped, so only the pages that are walked get read and memory use stays flat.
+
+    :rtype: Iterator[Tuple[int, Tuple[str, ...], str, bool, int, int]]
+    """
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        with open(path_or_buffer, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield from iter_chunks(buffer)
+        return
+
+    view = memoryview(path_or_buffer)
+    try:
+        unpack_from = struct.unpack_from
+        offset = 0
+        end = len(view)
+        path = ()
+        ends = []  # End offsets of the Forms in path
+        while True:
+            while ends and offset >= ends[-1]:
+                ends.pop()
+                path = path[:-1]
+            if offset >= end:
+                break
+
+            try:
+                magic, size = unpack_from(">4sI", view, offset)
+            except struct.error:
+                raise ParseError("Truncated chunk header, %i bytes left" % (end - offset), offset) from None
+            if magic == b"FORM":
+                form_type = bytes(view[offset + 8:offset + 12]).decode()
+                yield len(path), path, form_type, True, offset, size
+                ends.append(offset + 8 + size)
+                path += (form_type,)
+                offset += 12
+            else:
+                yield len(path), path, magic.decode(), False, offset, size
+                offset += 8 + size + (size & 1)  # Skip pad byte
+    finally:
+        view.release()
+
+
+# The _parents of an interned node. It is shared by many Forms, so it keeps no links to them and cannot change.
+_frozen = object()
+
+
+class Node(object):
+    """
+    Common base of Chunk and Form. Nodes cache their encoded size and remember the Forms they were added to,
+    so changing a node drops the cached state of everything above it. Only nodes that cannot change behind our back
+    cache anything: plain Chunks without a typed view, and Forms whose sub_chunks all have a cached size.
+    The links up are weak references, so a tree has no reference cycles and is freed as soon as it is dropped.
+    """
+    __slots__ = ("_parents", "_size", "_hash", "__weakref__")
+    # Attributes that hold cached or structural state. Setting any other attribute marks the node dirty.
+    _state_attributes = frozenset(("_parents", "_size", "_hash", "_span", "_lazy_span", "_sub_chunks", "sub_chunks",
+                                   "_index", "_view", "_view_data", "_mapping"))
+    # Attributes that Forms are indexed by
+    _id_attributes = frozenset(("chunk_id", "form_type"))
+    # Attributes that a cached typed view of a Chunk is decoded from
+    _view_attributes = frozenset(("chunk_id", "data"))
+
+    def __init__(self):
+        # A fresh node has nothing to invalidate, so skip __setattr__
+        object.__setattr__(self, "_parents", None)  # None, a weak reference to a Form or a list of them
+        object.__setattr__(self, "_size", None)
+        object.__setattr__(self, "_hash", None)  # Only ever set while _size is, so mark_dirty drops both
+        # While _size is None, so is the _size of every Form above
+
+    def __setattr__(self, name, value):
+        if name in self._state_attributes:
+            object.__setattr__(self, name, value)
+            return
+        if self._parents is _frozen:
+            raise AttributeError("%s is interned and shared, it cannot be changed" % type(self).__name__)
+        object.__setattr__(self, name, value)
+        self.mark_dirty()
+        if name in self._id_attributes:
+            self._structure_changed()
+        if name in self._view_attributes:
+            self._drop_view()
+
+    def mark_dirty(self):
+        """
+        Drops the cached state of this node and of every Form it is part of.
+        Fields are tracked automatically when assigned. Typed chunks are encoded again every time they are written,
+        so changing a field in place (strc.pos[0] = 1.0) needs no call either.
+        """
+        if self._size is None:
+            # Whoever is above us has already been invalidated
+            return
+        parents = self._parents
+        if parents is _frozen:
+            raise AttributeError("%s is interned and shared, it cannot be changed" % type(self).__name__)
+        object.__setattr__(self, "_size", None)
+        object.__setattr__(self, "_hash", None)
+        if parents is None:
+            return
+        if type(parents) is list:
+            for parent in self._parent_nodes():
+                parent.mark_dirty()
+        else:
+            parent = parents()
+            if parent is not None:
+                parent.mark_dirty()
+
+    @property
+    def frozen(self):
+        """
+        True for snapshots made by freeze() and for interned nodes. They cannot change and can be shared freely.
+        """
+        return self._parents is _frozen
+
+    def _parent_nodes(self):
+        # The nodes above us that are still alive: the Forms we were added to, or the Chunk of a typed view
+        parents = self._parents
+        if parents is None or parents is _frozen:
+            return ()
+        if type(parents) is not list:
+            parent = parents()
+            return () if parent is None else (parent, )
+        return [parent for parent in (ref() for ref in parents) if parent is not None]
+
+    def _structure_changed(self):
+        # A node was added, removed or renamed below every Form above us, their indexes have to be rebuilt
+        for parent in self._parent_nodes():
+            if parent._index is not None:
+                object.__setattr__(parent, "_index", False)
+            parent._structure_changed()
+
+    def _link(self, parent):
+        parents = self._parents
+        if parents is _frozen:
+            return
+        ref = weakref.ref(parent)
+        if parents is None or (type(parents) is not list and parents() is None):
+            # Also replaces the link to a Form that is gone
+            object.__setattr__(self, "_parents", ref)
+        elif type(parents) is list:
+            parents.append(ref)
+        else:
+            object.__setattr__(self, "_parents", [parents, ref])
+
+    def _unlink(self, parent):
+        parents = self._parents
+        if parents is None or parents is _frozen:
+            return
+        # A Form has only one plain weak reference, weakref.ref hands out the existing one
+        ref = weakref.ref(parent)
+        if type(parents) is list:
+            parents.remove(ref)
+            if len(parents) == 1:
+                object.__setattr__(self, "_parents", parents[0])
+        elif parents is ref:
+            object.__setattr__(self, "_parents", None)
+
+
+class ChunkList(list):
+    """
+    The sub_chunks of a Form. Keeps the parent links of its items and the cached size of the Form up to date
+    when it is modified in place. The typed Form made by Form.to_class shares the list and is kept up to date too.
+    """
+    __slots__ = ("_form", "_view")  # Weak references, the Forms own the list and not the other way around
+
+    def __init__(self, form, sub_chunks=(), view=None):
+        super(ChunkList, self).__init__(sub_chunks)
+        self._form = weakref.ref(form)
+        self._view = None if view is None else weakref.ref(view)
+        form_ref = self._form
+        for c in self:
+            if c._parents is None:
+                object.__setattr__(c, "_parents", form_ref)
+            else:
+                c._link(form)
+            if view is not None:
+                c._link(view)
+
+    def _owners(self):
+        """
+        The Form and the typed view sharing this list, as far as they are still alive
+
+        :rtype: tuple[Form, Form]
+        """
+        form = self._form()
+        view = None if self._view is None else self._view()
+        if form is None:
+            # The typed view outlived the Form, it owns the list alone now
+            return view, None
+        return form, view
+
+    def _link(self, chunk):
+        for owner in self._owners():
+            if owner is not None:
+                chunk._link(owner)
+
+    def _unlink(self, chunk):
+        for owner in self._owners():
+            if owner is not None:
+                chunk._unlink(owner)
+
+    def _changed(self):
+        for owner in self._owners():
+            if owner is not None:
+                owner._children_changed()
+
+    def _share(self, view):
+        # Makes view, a typed Form, a second owner of this list. A previous view gets a list of its own.
+        form, old_view = self._owners()
+        if old_view is not None:
+            for c in self:
+                c._unlink(old_view)
+            object.__setattr__(old_view, "_sub_chunks", ChunkList(old_view, self))
+        for c in view._sub_chunks:
+            c._unlink(view)
+        self._form = weakref.ref(form)
+        self._view = weakref.ref(view)
+        for c in self:
+            c._link(view)
+        object.__setattr__(view, "_sub_chunks", self)
+        view._children_changed()
+
+    def _replaced(self, old_chunks):
+        for c in old_chunks:
+            self._unlink(c)
+        for c in self:
+            self._link(c)
+        self._changed()
+
+    def append(self, chunk):
+        super(ChunkList, self).append(chunk)
+        self._link(chunk)
+        self._changed()
+
+    def extend(self, chunks):
+        chunks = list(chunks)
+        super(ChunkList, self).extend(chunks)
+        for c in chunks:
+            self._link(c)
+        self._changed()
+
+    def __iadd__(self, chunks):
+        self.extend(chunks)
+        return self
+
+    def insert(self, index, chunk):
+        super(ChunkList, self).insert(index, chunk)
+        self._link(chunk)
+        self._changed()
+
+    def pop(self, index=-1):
+        chunk = super(ChunkList, self).pop(index)
+        self._unlink(chunk)
+        self._changed()
+        return chunk
+
+    def remove(self, chunk):
+        super(ChunkList, self).remove(chunk)
+        self._unlink(chunk)
+        self._changed()
+
+    def clear(self):
+        old_chunks = list(self)
+        super(ChunkList, self).clear()
+        self._replaced(old_chunks)
+
+    def __setitem__(self, index, value):
+        old_chunks = list(self)
+        super(ChunkList, self).__setitem__(index, value)
+        self._replaced(old_chunks)
+
+    def __delitem__(self, index):
+        old_chunks = list(self)
+        super(ChunkList, self).__delitem__(index)
+        self._replaced(old_chunks)
+
+    def __imul__(self, count):
+        old_chunks = list(self)
+        super(ChunkList, self).__imul__(count)
+        self._replaced(old_chunks)
+        return self
+
+    def sort(self, *args, **kwargs):
+        super(ChunkList, self).sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super(ChunkList, self).reverse()
+        self._changed()
+
+
+class ViewCacheStats(object):
+    """
+    Counts how often Chunk.view could hand out a cached typed view instead of decoding the chunk again
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.write_backs = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.write_backs = 0
+
+
+view_cache = ViewCacheStats()
+
+
+class Chunk(Node):
+    __slots__ = ("chunk_id", "data", "_view", "_view_data")
+    _index = None  # A Chunk is only ever the parent of its own typed view, which is never indexed
+
     def __init__(self, chunk_id="?!!?"):
-        self.chunk_id = chunk_id
-        self.data = bytes("", "ascii")
+        super(Chunk, self).__init__()
+        object.__setattr__(self, "chunk_id", chunk_id)
+        object.__setattr__(self, "data", bytes("", "ascii"))
+        object.__setattr__(self, "_view", None)  # Typed view handed out by view()
+        object.__setattr__(self, "_view_data", None)  # What _view encoded to when data was last taken from it
 
     @staticmethod
     def validate_id(chunk_id):
@@ -97,7 +543,10 @@ class Chunk(object):
             raise ValueError("chunk_data must be bytes. Supplied type was %s" % type(chunk_data))
         return chunk_data
 
-    def set_binary_data(self, binary_data):
+    def set_binary_data(self, binary_data, verifier=None):
+        """
+        :param verifier: RoundTripVerifier that checks the decode of typed chunks, round_trip by default
+        """
         self.data = binary_data
 
     # Returns only chunk data
@@ -106,7 +555,26 @@ class Chunk(object):
 
         :rtype: bytes
         """
-        return self.data
+        self._sync_view()
+        return bytes(self.data)
+
+    def _sync_view(self):
+        # The typed view may have been changed in place, it holds the current contents. Compare against its own last
+        # encoding, not data, so a chunk that does not encode back to the same bytes is left alone until it changes.
+        view = self._view
+        if view is not None:
+            data = view.get_data()
+            if data != self._view_data:
+                object.__setattr__(self, "data", data)
+                object.__setattr__(self, "_view_data", data)
+                view_cache.write_backs += 1
+
+    def _drop_view(self):
+        view = self._view
+        if view is not None:
+            object.__setattr__(view, "_parents", None)
+            object.__setattr__(self, "_view", None)
+            object.__setattr__(self, "_view_data", None)
 
     # Returns chunk_id, size, chunk_data and pad byte
     def full_data(self):
@@ -120,12 +588,88 @@ class Chunk(object):
             data += b"\x00"
         return bytes(self.chunk_id, "ascii") + struct.pack(">I", data_length) + data
 
+    def _payload(self):
+        # Raw chunks hand out their data as is (it may be a memoryview), typed chunks have to encode it
+        if type(self) is Chunk:
+            self._sync_view()
+            return self.data
+        return self.get_data()
+
+    def _cacheable(self):
+        # Only the data of a plain Chunk can't change without an assignment, typed chunks and typed views can be
+        # changed in place
+        return type(self) is Chunk and self._view is None
+
     def size(self):
         """
+        Size of chunk_data. Cached for plain Chunks, typed chunks are encoded again every time.
+
+        :rtype: int
+        """
+        if self._size is None:
+            size = len(self._payload())
+            if not self._cacheable():
+                return size
+            self._size = size
+        return self._size
+
+    def content_hash(self):
+        """
+        Digest of chunk_id and chunk_data, cached like size(). Chunks with the same hash encode to the same bytes.
+
+        :rtype: bytes
+        """
+        if self._hash is None:
+            payload = self._payload()
+            h = hashlib.blake2b(b"C" + bytes(self.chunk_id, "ascii"), digest_size=16)
+            h.update(payload)
+            if not self._cacheable():
+                return h.digest()
+            self._size = len(payload)
+            object.__setattr__(self, "_hash", h.digest())
+        return self._hash
+
+    def freeze(self):
+        """
+        Returns a read-only snapshot of this chunk as a plain Chunk holding the encoded data
+
+        :rtype: Chunk
+        """
+        if self._parents is _frozen:
+            return self
+        snapshot = self.thaw()
+        object.__setattr__(snapshot, "_parents", _frozen)
+        return snapshot
+
+    def thaw(self):
+        """
+        Returns an editable copy of this chunk
+
+        :rtype: Chunk
+        """
+        copy = Chunk(self.chunk_id)
+        object.__setattr__(copy, "data", bytes(self._payload()))
+        # A plain chunk keeps its hash for the next copy, a typed one caches nothing and the copy hashes itself
+        object.__setattr__(copy, "_size", len(copy.data))
+        object.__setattr__(copy, "_hash", self.content_hash() if self._cacheable() else None)
+        copy.content_hash()
+        return copy
+
+    def write_to(self, f):
+        """
+        Writes chunk_id, size, chunk_data and pad byte to the file object f
 
+        :return: number of bytes written
         :rtype: int
         """
-        return len(self.data)
+        data = self._payload()
+        data_length = len(data)
+        f.write(bytes(self.chunk_id, "ascii") + struct.pack(">I", data_length))
+        f.write(data)
+        if data_length % 2:
+            f.write(b"\x00")
+            return data_length + 9
+        return data_length + 8
 
     def load_data_from_file(self, file_name):
         if not os.path.isfile(file_name):
@@ -165,24 +709,70 @@ class Chunk(object):
         with open(file_name, "wb") as f:
             f.write(self.full_data())
 
-    def to_class(self):
-        if self.chunk_id in master_list:
-            o = master_list[self.chunk_id]()  # type: Chunk
-            o.set_binary_data(self.data)
-            return o
+    def to_class(self, verifier=None):
+        """
+        Returns this chunk decoded into its typed class. It is a copy, changing it does not change this chunk,
+        use view() for that.
+
+        :param verifier: RoundTripVerifier that checks the decode, round_trip by default
+
+        :rtype: Chunk
+        """
+        if self.chunk_id not in master_list:
+            raise ValueError("This class cannot be converted")  # No Test Coverage
+        o = master_list[self.chunk_id]()  # type: Chunk
+        o.set_binary_data(self.get_data(), verifier)
+        return o
+
+    def view(self, verifier=None):
+        """
+        Returns the typed view of this chunk. It is decoded once and cached, and editing it edits this chunk, in place
+        changes (strc.pos[0] = 1.0) included: the view is encoded again whenever data is needed. A chunk that already
+        is of its typed class is its own view, a frozen chunk cannot change and gets a copy.
 
-        raise ValueError("This class cannot be converted")  # No Test Coverage
+        :param verifier: RoundTripVerifier that checks the decode, round_trip by default
 
-    def to_dict(self):
+        :rtype: Chunk
+        """
+        if self.chunk_id not in master_list:
+            raise ValueError("This class cannot be converted")  # No Test Coverage
+        cls = master_list[self.chunk_id]
+        if type(self) is cls:
+            view_cache.hits += 1
+            return self
+        if self._view is not None:
+            view_cache.hits += 1
+            return self._view
+        if self._parents is _frozen or type(self) is not Chunk:
+            return self.to_class(verifier)
+
+        view_cache.misses += 1
+        o = cls()  # type: Chunk
+        o.set_binary_data(self.get_data(), verifier)
+        # From now on this chunk can change whenever the view does, so neither it nor the Forms above keep a cached
+        # size or the span they were parsed from
+        self.mark_dirty()
+        object.__setattr__(o, "_parents", weakref.ref(self))
+        object.__setattr__(self, "_view", o)
+        object.__setattr__(self, "_view_data", o.get_data())
+        return o
+
+    def to_dict(self, version=1):
+        if self._view is not None:
+            view_cache.hits += 1
+            return self._view.to_dict(version)
         if self.chunk_id in master_list:
             o = master_list[self.chunk_id]()  # type: Chunk
-            o.set_binary_data(self.data)
-            return o.to_dict()
+            o.set_binary_data(self.get_data())
+            return o.to_dict(version)
         # Generic json support for all IFF chunks
         return {self.chunk_id: {"data": base64.b64encode(self.data).decode("ascii")}}  # No Test Coverage
 
-    def to_json(self):
-        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+    def to_json(self, version=1):
+        """
+        :param version: JSON layout to write, one of json_versions
+        """
+        return json.dumps(self.to_dict(check_json_version(version)), indent=2, sort_keys=True)
 
     def from_json(self, json_dict):
         if isinstance(json_dict, str):
@@ -205,20 +795,69 @@ class Chunk(object):
 
         self.chunk_id, attributes_dict = json_dict.popitem()
         for k, v in attributes_dict.items():
+            # With __slots__ an unknown key would fail with an AttributeError, state attributes must not be set at all
+            if not hasattr(type(self), k) or k in self._state_attributes:
+                raise ValueError("Unknown key %r in the JSON of %s" % (k, self.chunk_id))
             setattr(self, k, v)
         return self
 
 
-class Form(object):
+class Form(Node):
+    __slots__ = ("form_type", "_sub_chunks", "_span", "_lazy_span", "_index", "_mapping")
+
     def __init__(self, form_type="!??!", sub_chunks=None):
-        self.form_type = form_type
+        super(Form, self).__init__()
+        object.__setattr__(self, "_span", None)  # The bytes this Form was parsed from, while it is unchanged
+        object.__setattr__(self, "_lazy_span", None)  # (buffer, start, end) of sub_chunks that are not parsed yet
+        object.__setattr__(self, "_index", None)  # None when not indexed, False when it has to be rebuilt
+        object.__setattr__(self, "_mapping", None)  # The mmap a lazy load_from_file reads from, see close()
+        object.__setattr__(self, "form_type", form_type)
         if sub_chunks is None:
             sub_chunks = []
 
         if not isinstance(sub_chunks, list):
             raise ValueError("sub_chunks must be a list. Supplied type was %s" % type(sub_chunks))
 
-        self.sub_chunks = sub_chunks  # type: List[Union[Form, Chunk]]
+        object.__setattr__(self, "_sub_chunks", ChunkList(self, sub_chunks))  # type: List[Union[Form, Chunk]]
+
+    @property
+    def sub_chunks(self):
+        """
+
+        :rtype: List[Union[Form, Chunk]]
+        """
+        if self._lazy_span is not None:
+            buffer, start, end = self._lazy_span
+            object.__setattr__(self, "_lazy_span", None)
+            object.__setattr__(self, "_sub_chunks", ChunkList(self, self.parse_buffer(buffer, start, end, lazy=True)))
+        return self._sub_chunks
+
+    @sub_chunks.setter
+    def sub_chunks(self, sub_chunks):
+        old_chunks = self._sub_chunks
+        if type(old_chunks) is ChunkList:
+            # Replace the list of the Form and of its typed view alike, whichever of the two this is
+            form, view = old_chunks._owners()
+            for c in old_chunks:
+                old_chunks._unlink(c)
+        else:
+            form, view = self, None
+        new_chunks = ChunkList(form, sub_chunks, view)
+        object.__setattr__(self, "_lazy_span", None)
+        object.__setattr__(form, "_sub_chunks", new_chunks)
+        if view is not None:
+            object.__setattr__(view, "_sub_chunks", new_chunks)
+        new_chunks._changed()
+
+    def mark_dirty(self):
+        object.__setattr__(self, "_span", None)
+        super(Form, self).mark_dirty()
+
+    def _children_changed(self):
+        if self._index is not None:
+            object.__setattr__(self, "_index", False)
+        self._structure_changed()
+        self.mark_dirty()
 
     @staticmethod
     def validate_form_type(form_type):
@@ -251,11 +890,7 @@ class Form(object):
 
         :rtype: bytes
         """
-        form_header = bytes(self.form_type, "ascii")
-        form_data = bytes()
-        for c in self.sub_chunks:
-            form_data += c.full_data()
-        return form_header + form_data
+        return self.full_data()[8:]
 
     # Returns form_type, size, form_data
     def full_data(self):
@@ -263,29 +898,85 @@ class Form(object):
 
         :rtype: bytes
         """
-        data = self.get_data()
-        data_length = len(data)
-        return bytes("FORM", "ascii") + struct.pack(">I", data_length) + data
+        f = io.BytesIO()
+        self.write_to(f)
+        return f.getvalue()
+
+    def write_to(self, f):
+        """
+        Streams "FORM", size and form_data to the file object f.
+        Sizes are known up front, so nothing has to be buffered while writing.
+
+        :return: number of bytes written
+        :rtype: int
+        """
+        if self._span is not None:
+            # Nothing below us changed since we were parsed
+            f.write(self._span)
+            return len(self._span)
+
+        form_size = self.size()
+        f.write(b"FORM" + struct.pack(">I", form_size) + bytes(self.form_type, "ascii"))
+        for c in self.sub_chunks:
+            c.write_to(f)
+        return form_size + 8
 
     def to_class(self):
-        if self.form_type in master_list:
-            o = master_list[self.form_type]()
-            # parsed_bas = Form().parse_stream(io.BytesIO(self.full_data()))[0]
-            o.sub_chunks = self.sub_chunks
-            o.form_type = self.form_type
-            return o
+        """
+        Returns this Form as its typed class. The typed Form shares the sub_chunks of this one, so chunks added or
+        removed through either show up in both. It is cached for as long as it is in use. A Form that already is of
+        its typed class is returned as is, a frozen Form gets a typed copy.
+
+        :rtype: Form
+        """
+        if self.form_type not in master_list:
+            raise ValueError("This class cannot be converted")  # No Test Coverage
+        cls = master_list[self.form_type]
+        if type(self) is cls:
+            return self
 
-        raise ValueError("This class cannot be converted")  # No Test Coverage
+        sub_chunks = self.sub_chunks
+        if type(sub_chunks) is ChunkList:
+            view = sub_chunks._owners()[1]
+            if type(view) is cls:
+                return view
+        o = cls()
+        o.form_type = self.form_type
+        if type(sub_chunks) is ChunkList:
+            sub_chunks._share(o)
+        else:
+            o.sub_chunks = list(sub_chunks)
+        return o
 
-    def to_dict(self):
+    def to_dict(self, version=1):
         # Generic json support for all IFF forms
         children = []
         for child in self.sub_chunks:
-            children.append(child.to_dict())
+            children.append(child.to_dict(version))
         return {self.form_type: children}
 
-    def to_json(self):
-        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+    def to_lazy_dict(self, version=1):
+        """
+        to_dict() with the children converted only when they are iterated, see myjson.LazyList.
+        json.dump encodes it lazily, any encoder gives the same output as for to_dict(). Without myjson this is
+        to_dict().
+        """
+        if LazyList is None:
+            return self.to_dict(version)
+        convert = functools.partial(Form._lazy_child_dict, version=version)
+        return {self.form_type: LazyList(self.sub_chunks, convert)}
+
+    @staticmethod
+    def _lazy_child_dict(child, version):
+        if isinstance(child, Form):
+            return child.to_lazy_dict(version)
+        return child.to_dict(version)
+
+    def to_json(self, version=1):
+        """
+        :param version: JSON layout to write, one of json_versions
+        """
+        return json.dumps(self.to_dict(check_json_version(version)), indent=2, sort_keys=True)
 
     def from_json(self, json_dict):
         # Generic json support for all IFF forms
@@ -309,21 +1000,141 @@ class Form(object):
         raise ValueError("Fall through error. This shouldnt happen on well formed data "
                          "Check that you didn't send bytes to this function")  # No Test Coverage
 
-    def from_json_file(self, file_name):
+    def from_json_file(self, file_name, intern=False):
+        """
+        With intern=True identical chunks and small Forms are shared with everything else loaded that way,
+        see Interner.
+        """
         with open(file_name, "r") as f:
-            return self.from_json(json.loads(f.read()))
+            form = self.from_json(json.loads(f.read()))
+        if intern:
+            interner.intern_sub_chunks(form)
+        return form
 
     def size(self):
         """
+        Size of form_data. Cached until this Form or anything below it changes.
 
         :rtype: int
         """
-        return len(self.get_data())
+        if self._size is None:
+            form_size = 4
+            cacheable = True
+            for c in self.sub_chunks:
+                data_length = c.size()
+                cacheable = cacheable and c._size is not None
+                if isinstance(c, Form):
+                    form_size += 8 + data_length
+                else:
+                    form_size += 8 + data_length + data_length % 2
+            if not cacheable:
+                # A typed chunk below can change in place
+                return form_size
+            self._size = form_size
+        return self._size
+
+    def content_hash(self):
+        """
+        Digest of form_type and the hashes of all sub_chunks, computed bottom-up and cached like size().
+        Forms with the same hash encode to the same bytes.
+
+        :rtype: bytes
+        """
+        if self._hash is None:
+            self.size()
+            h = hashlib.blake2b(b"F" + bytes(self.form_type, "ascii"), digest_size=16)
+            for c in self.sub_chunks:
+                h.update(c.content_hash())
+            if self._size is None:
+                return h.digest()
+            object.__setattr__(self, "_hash", h.digest())
+        return self._hash
+
+    def freeze(self):
+        """
+        Returns a read-only snapshot of this Form with every size and hash already cached, so it can be shared
+        between threads without locks. Sub chunks that are frozen already are reused instead of copied.
+        The snapshot is made of plain Forms and Chunks, derived state of typed Forms like Embd is not kept.
+
+        :rtype: Form
+        """
+        if self._parents is _frozen:
+            return self
+        with gc_paused():
+            return self._freeze()
+
+    def _freeze(self):
+        snapshot = Form(self.form_type)
+        sub_chunks = tuple(c._freeze() if isinstance(c, Form) and c._parents is not _frozen else c.freeze()
+                           for c in self.sub_chunks)
+        object.__setattr__(snapshot, "_sub_chunks", sub_chunks)
+        object.__setattr__(snapshot, "_span", self._unmapped_span())
+        snapshot.content_hash()
+        object.__setattr__(snapshot, "_parents", _frozen)
+        return snapshot
+
+    def thaw(self):
+        """
+        Returns an editable copy of this Form that shares its sub_chunks with the original (copy on write).
+        Use thaw_child to get an editable copy of a sub chunk in place, and freeze the result again when done.
+
+        :rtype: Form
+        """
+        copy = Form(self.form_type, list(self.sub_chunks))
+        self.content_hash()
+        object.__setattr__(copy, "_size", self._size)
+        object.__setattr__(copy, "_hash", self._hash)
+        object.__setattr__(copy, "_span", self._unmapped_span())
+        return copy
+
+    def _unmapped_span(self):
+        # The _span for a copy of this Form. A span over the file of a lazy load is left out, close() can't reach the
+        # copy to release it, so the copy encodes its sub_chunks instead.
+        span = self._span
+        if span is not None and isinstance(span.obj, mmap.mmap):
+            return None
+        return span
+
+    def thaw_child(self, index):
+        """
+        Replaces sub_chunks[index] with an editable copy if it is frozen and returns it
+
+        :rtype: Union[Form, Chunk]
+        """
+        child = self.sub_chunks[index]
+        if child._parents is _frozen:
+            child = child.thaw()
+            self.sub_chunks[index] = child
+        return child
+
+    def build_index(self):
+        """
+        Indexes every Form and Chunk below this Form by form_type/chunk_id in document order.
+        get_all and get_single use the index from then on. add_chunk keeps it up to date, other changes to the tree
+        make it rebuild on the next lookup.
+        """
+        index = {}
+        self._add_to_index(index)
+        object.__setattr__(self, "_index", index)
+        return self
+
+    def _add_to_index(self, index):
+        for child in self.sub_chunks:
+            if isinstance(child, Form):
+                index.setdefault(child.form_type, []).append(child)
+                child._add_to_index(index)
+            else:
+                index.setdefault(child.chunk_id, []).append(child)
 
     def get_all(self, ckid, max_count=9999):
         """
         :rtype: list[Union[Form,Chunk]]
         """
+        if self._index is not None:
+            if self._index is False:
+                self.build_index()
+            return self._index.get(ckid, [])[:max_count]
+
         ret_chunks = []
         for child in self.sub_chunks:
             if len(ret_chunks) >= max_count:
@@ -345,62 +1156,703 @@ class Form(object):
             return ret_form[0]
         return None
 
-    def load_from_file(self, file_name):
+    def load_from_file(self, file_name, lazy=False, intern=False, limits=None):
+        """
+        With lazy=True the file is memory mapped and only the offset and length of each child is recorded.
+        A Form's sub_chunks are parsed the first time they are accessed. The file stays mapped until close() is
+        called, or use the Form as a context manager.
+        With intern=True identical chunks and small Forms are shared with everything else loaded that way,
+        see Interner.
+        With limits (a ParseLimits) the file is parsed strictly, use this for files from untrusted sources.
+        """
         if not os.path.isfile(file_name):
             raise FileNotFoundError("The specified file could not be found: %s" % file_name)
+        if lazy and intern:
+            raise ValueError("lazy and intern cannot be combined, interning has to parse everything")
+        if lazy and limits is not None:
+            raise ValueError("lazy and limits cannot be combined, strict parsing has to check everything up front")
 
+        self.close()
         with open(file_name, "rb") as bas_file:
-            parsed_bas = Form().parse_stream(bas_file)[0]
-            self.sub_chunks = parsed_bas.sub_chunks
-            self.form_type = parsed_bas.form_type
+            if lazy:
+                bas_data = mmap.mmap(bas_file.fileno(), 0, access=mmap.ACCESS_READ)
+                object.__setattr__(self, "_mapping", bas_data)
+                parsed_bas = Form().parse_buffer(bas_data, lazy=True)[0]
+            else:
+                with gc_paused():
+                    parsed_bas = Form().parse_stream(bas_file, limits=limits)
+                if not parsed_bas or not isinstance(parsed_bas[0], Form):
+                    raise ParseError("File does not start with a FORM", 0)
+                parsed_bas = parsed_bas[0]
+            self._adopt(parsed_bas)
+        if intern:
+            interner.intern_sub_chunks(self)
 
         return self
 
+    def close(self):
+        """
+        Unmaps the file of a lazy load_from_file. Whatever the tree still reads from the file is copied into memory
+        first, so the Form stays usable. Does nothing for Forms that were not loaded lazily.
+        Chunks that were taken out of the tree before keep the mapping in use, closing then raises BufferError.
+        """
+        mapping = self._mapping
+        if mapping is None:
+            return
+        self._copy_from(mapping)
+        object.__setattr__(self, "_mapping", None)
+        mapping.close()
+
+    def _copy_from(self, mapping):
+        # Replaces every memoryview of mapping below this Form by a copy, none of this changes the contents
+        span = self._span
+        if span is not None and span.obj is mapping:
+            if self._lazy_span is not None:
+                # Not parsed yet, one copy serves both the span and the sub_chunks that are parsed from it later
+                span = memoryview(bytes(span))
+                object.__setattr__(self, "_span", span)
+                object.__setattr__(self, "_lazy_span", (span, 12, len(span)))
+                return
+            object.__setattr__(self, "_span", None)
+        elif self._lazy_span is not None:
+            buffer, start, end = self._lazy_span
+            if buffer.obj is mapping:
+                object.__setattr__(self, "_lazy_span", (memoryview(bytes(buffer[start:end])), 0, end - start))
+            return
+        for c in self._sub_chunks:
+            if isinstance(c, Form):
+                c._copy_from(mapping)
+            elif isinstance(c.data, memoryview) and c.data.obj is mapping:
+                object.__setattr__(c, "data", bytes(c.data))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _adopt(self, form):
+        # Takes over the parsed sub_chunks of form, including what is needed to write it back out unchanged
+        lazy_span, size, span = form._lazy_span, form._size, form._span
+        sub_chunks = [] if lazy_span is not None else list(form.sub_chunks)
+        form.sub_chunks = []
+
+        self.form_type = form.form_type
+        self.sub_chunks = sub_chunks
+        object.__setattr__(self, "_lazy_span", lazy_span)
+        object.__setattr__(self, "_size", size)
+        object.__setattr__(self, "_span", span)
+
     def save_to_file(self, file_name):
-        with open(file_name, "wb") as f:
-            f.write(self.full_data())
+        # Write next to the target and swap it in so a memory mapped source file is never truncated under us
+        temp_file_name = file_name + ".tmp"
+        with open(temp_file_name, "wb") as f:
+            self.write_to(f)
+        os.replace(temp_file_name, file_name)
+
+    def save_to_json_file(self, file_name, version=1):
+        """
+        Writes what to_json() returns, but converts one chunk at a time while it is written instead of building the
+        dict and string for the whole Form first
 
-    def save_to_json_file(self, file_name):
+        :param version: JSON layout to write, one of json_versions
+        """
+        lazy_dict = self.to_lazy_dict(check_json_version(version))
         with open(file_name, "wt") as f:
-            f.write(self.to_json())
+            json.dump(lazy_dict, f, indent=2, sort_keys=True)
 
-    def parse_stream(self, bas_data):
+    def parse_stream(self, bas_data, limits=None):
         """
+        With limits no more than limits.max_bytes + 1 bytes are read from bas_data.
 
         :rtype: list
         """
+        if limits is None:
+            return self.parse_buffer(bas_data.read())
+        buffer = bas_data.read(limits.max_bytes + 1)
+        if len(buffer) > limits.max_bytes:
+            raise ParseError("Input is larger than %i bytes" % limits.max_bytes, limits.max_bytes)
+        return self.parse_buffer(buffer, limits=limits)
+
+    def parse_buffer(self, buffer, offset=0, end=None, lazy=False, limits=None):
+        """
+        Parses IFF data from any bytes-like object without copying it.
+        Every Chunk gets a memoryview slice of the buffer as its data and every Form keeps the slice it was parsed
+        from, which write_to copies verbatim until something below the Form changes.
+        With lazy=True nested Forms only remember where their sub_chunks are and parse them on first access.
+        A header cut short by the end of the data raises a ParseError, a short chunk keeps the bytes that are there.
+        With limits (a ParseLimits) every header is checked against what is left of its parent and the limits,
+        a ParseError with the offset of the first problem is raised instead of returning a truncated tree.
+
+        :rtype: list
+        """
+        view = memoryview(buffer)
+        if end is None:
+            end = len(view)
+        if limits is not None:
+            if lazy:
+                raise ValueError("lazy and limits cannot be combined")
+            if end - offset > limits.max_bytes:
+                raise ParseError("Input is larger than %i bytes" % limits.max_bytes, offset + limits.max_bytes)
+            return self._parse_strict(view, offset, end, 0, limits, [0])
+        log_debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
         ret_chunks = []
-        while True:
-            magic = bytes(bas_data.read(4)).decode()
-            if not magic:
-                break
+        while offset < end:
+            try:
+                magic, size = struct.unpack_from(">4sI", view, offset)
+            except struct.error:
+                raise ParseError("Truncated chunk header, %i bytes left" % (end - offset), offset) from None
+            offset += 8
+
+            if magic == b"FORM":
+                form_type = bytes(view[offset:offset + 4]).decode()
+                if log_debug:
+                    logging.debug("Found Form %s %i", form_type, size)
+                if lazy:
+                    form = Form(form_type=form_type)
+                    object.__setattr__(form, "_lazy_span", (view, offset + 4, offset + size))
+                else:
+                    form = Form(form_type=form_type, sub_chunks=self.parse_buffer(view, offset + 4, offset + size))
+                # Fresh Form, so set its caches directly. A node with a cached size always has its children sized.
+                object.__setattr__(form, "_size", size)
+                object.__setattr__(form, "_span", view[offset - 8:offset + size])
+                ret_chunks.append(form)
+                offset += size
+                continue
+
+            chunk_id = magic.decode()
+            if log_debug:
+                logging.debug("Found Chunk %s %i", chunk_id, size)
+            c = Chunk(chunk_id)
+            object.__setattr__(c, "data", view[offset:offset + size])  # Fresh chunk, nothing to invalidate
+            object.__setattr__(c, "_size", size)
+            ret_chunks.append(c)
+            offset += size + (size & 1)  # Skip pad byte
+
+        return ret_chunks
+
+    def _parse_strict(self, view, offset, end, depth, limits, chunk_count):
+        # Same tree as parse_buffer, but nothing in the input is trusted. chunk_count is shared by the whole parse.
+        if depth > limits.max_depth:
+            raise ParseError("Forms are nested deeper than %i" % limits.max_depth, offset)
 
-            if magic == "FORM":
-                form_size = struct.unpack(">I", bas_data.read(4))[0] - 4
-                form_type = bytes(bas_data.read(4)).decode()
-                form_data_stream = io.BytesIO(bas_data.read(form_size))
-                logging.debug("Found Form", form_type, form_size)
-                ret_chunks.append(Form(form_type=form_type, sub_chunks=self.parse_stream(form_data_stream)))
+        ret_chunks = []
+        while offset < end:
+            if end - offset < 8:
+                raise ParseError("Truncated chunk header, %i bytes left" % (end - offset), offset)
+            magic, size = struct.unpack_from(">4sI", view, offset)
+            chunk_count[0] += 1
+            if chunk_count[0] > limits.max_chunks:
+                raise ParseError("More than %i chunks" % limits.max_chunks, offset)
+            if size > end - offset - 8:
+                raise ParseError("Size %i is larger than the %i bytes left in the parent" % (size, end - offset - 8),
+                                 offset)
+
+            if magic == b"FORM":
+                if size < 4:
+                    raise ParseError("FORM size %i leaves no room for the form type" % size, offset)
+                form_type = self._strict_id(view[offset + 8:offset + 12], offset + 8)
+                sub_chunks = self._parse_strict(view, offset + 12, offset + 8 + size, depth + 1, limits, chunk_count)
+                form = Form(form_type=form_type, sub_chunks=sub_chunks)
+                object.__setattr__(form, "_size", size)
+                object.__setattr__(form, "_span", view[offset:offset + 8 + size])
+                ret_chunks.append(form)
+                offset += 8 + size
                 continue
 
-            if magic != "FORM":
-                chunk_size = struct.unpack(">I", bas_data.read(4))[0]
-                chunk_id = magic
-                chunk_data = bas_data.read(chunk_size)
-                if chunk_size % 2:
-                    bas_data.read(1)  # Discard pad byte
-                logging.debug("Found Chunk", chunk_id, chunk_size)
-                c = Chunk(chunk_id)
-                c.set_binary_data(chunk_data)
-                ret_chunks.append(c)
+            c = Chunk(self._strict_id(magic, offset))
+            object.__setattr__(c, "data", view[offset + 8:offset + 8 + size])
+            object.__setattr__(c, "_size", size)
+            ret_chunks.append(c)
+            # A missing pad byte after the last chunk of a parent is tolerated, the loop ends either way
+            offset += 8 + size + (size & 1)
 
         return ret_chunks
 
+    @staticmethod
+    def _strict_id(raw, offset):
+        try:
+            return bytes(raw).decode("ascii")
+        except UnicodeDecodeError:
+            raise ParseError("Chunk id %r is not ASCII" % bytes(raw), offset) from None
+
     def add_chunk(self, chunk):
+        index = self._index
         self.sub_chunks.append(chunk)
+        if index:
+            # The new chunk comes last in document order, so it can be appended to our own index
+            if isinstance(chunk, Form):
+                index.setdefault(chunk.form_type, []).append(chunk)
+                chunk._add_to_index(index)
+            else:
+                index.setdefault(chunk.chunk_id, []).append(chunk)
+            object.__setattr__(self, "_index", index)
+
+
+def node_id(node):
+    return node.form_type if isinstance(node, Form) else node.chunk_id
+
+
+def diff(a, b, path=None):
+    """
+    Compares two trees by their content hashes and only descends into Forms that differ.
+    Sub chunks are paired up by id and position among the siblings with that id, OBJT 1 being the second OBJT.
+    The position is left out of the path when there is only one sibling with that id.
+
+    :return: list of (change, path) with change being "changed", "added" or "removed",
+             e.g. ("changed", "MC2 /OBJT/BASE/KIDS/OBJT 1/BASE/ROOT/NAME")
+    :rtype: list[tuple[str, str]]
+    """
+    if path is None:
+        path = node_id(a)
+    if a.content_hash() == b.content_hash():
+        return []
+    if not isinstance(a, Form) or not isinstance(b, Form) or a.form_type != b.form_type:
+        return [("changed", path)]
+
+    def by_id(form):
+        siblings = {}
+        for c in form.sub_chunks:
+            siblings.setdefault(node_id(c), []).append(c)
+        return siblings
+
+    a_siblings = by_id(a)
+    b_siblings = by_id(b)
+    changes = []
+    for ckid in list(a_siblings) + [x for x in b_siblings if x not in a_siblings]:
+        a_chunks = a_siblings.get(ckid, [])
+        b_chunks = b_siblings.get(ckid, [])
+        count = max(len(a_chunks), len(b_chunks))
+        for i in range(count):
+            child_path = path + "/" + ckid if count == 1 else "%s/%s %i" % (path, ckid, i)
+            if i >= len(b_chunks):
+                changes.append(("removed", child_path))
+            elif i >= len(a_chunks):
+                changes.append(("added", child_path))
+            else:
+                changes.extend(diff(a_chunks[i], b_chunks[i], child_path))
+    return changes
+
+
+class Interner(object):
+    """
+    Shares one instance per distinct Chunk and per distinct Form of at most max_form_nodes nodes, keyed by
+    content_hash. Shared nodes are frozen: assigning to them raises AttributeError and they keep no parent links.
+    Only plain Chunk and Form nodes are interned, typed classes are left alone.
+    The trees that use a shared node own it, the table only holds weak references: a node is dropped from it when the
+    last tree using it is freed. The module level interner that load_from_file and from_json_file use with
+    intern=True lives as long as the process, clear() makes later loads stop sharing with earlier ones.
+    """
+
+    def __init__(self, max_form_nodes=16):
+        self.max_form_nodes = max_form_nodes
+        self._nodes = weakref.WeakValueDictionary()  # content hash -> shared node
+        self.visited = 0  # Nodes that went through intern
+        self.deduplicated = 0  # Nodes that were dropped for an already shared copy, counting their whole subtree
+
+    def intern_sub_chunks(self, form):
+        """
+        Replaces the sub_chunks of form (which itself stays as it is) with shared nodes where possible
+        """
+        with gc_paused():
+            self._intern_children(form)
+        return form
+
+    def _intern_children(self, form):
+        span = form._span
+        nodes = 1
+        children = []
+        replaced = False
+        for c in form.sub_chunks:
+            shared, count = self._intern(c)
+            nodes += count
+            children.append(shared)
+            replaced = replaced or shared is not c
+        if replaced:
+            form.sub_chunks = children
+        if span is not None and form._span is None and form.size() and form._size is not None:
+            # Swapping in shared copies drops the span on the way up, but the content and so the bytes are the same
+            object.__setattr__(form, "_span", span)
+        return nodes
+
+    def _intern(self, node):
+        # Returns (node or its shared copy, number of nodes in the subtree)
+        self.visited += 1
+        if node._parents is _frozen:
+            return node, 1
+        if type(node) is Form:
+            count = self._intern_children(node)
+            if count > self.max_form_nodes:
+                return node, count
+        elif type(node) is Chunk:
+            count = 1
+        else:
+            return node, 1
+
+        key = node.content_hash()
+        shared = self._nodes.get(key)
+        if shared is not None:
+            self.deduplicated += count
+            return shared, count
+
+        self._freeze(node)
+        self._nodes[key] = node
+        return node, count
+
+    @staticmethod
+    def _freeze(node):
+        if type(node) is Form:
+            for c in node.sub_chunks:
+                c._unlink(node)
+            object.__setattr__(node, "_sub_chunks", tuple(node.sub_chunks))
+            object.__setattr__(node, "_span", None)  # Don't keep the whole source buffer alive
+            object.__setattr__(node, "_index", None)
+        elif isinstance(node.data, memoryview):
+            object.__setattr__(node, "data", bytes(node.data))
+        object.__setattr__(node, "_parents", _frozen)
+
+    def clear(self):
+        """
+        Forgets every shared node and resets the counts. Nodes shared so far stay frozen in the trees using them.
+        """
+        self._nodes.clear()
+        self.visited = 0
+        self.deduplicated = 0
+
+    def report(self):
+        """
+        shared counts the nodes that are still in use
+
+        :rtype: dict
+        """
+        return {"shared": len(self._nodes),
+                "visited": self.visited,
+                "deduplicated": self.deduplicated,
+                }
+
+
+interner = Interner()
+
+
+class Fixed(object):
+    """
+    A schema field stored with one struct format character, runs of Fixed fields share one precompiled struct.Struct
+    """
+    def __init__(self, name, fmt, default=0):
+        self.name = name
+        self.fmt = fmt
+        self.default = default
+
+    def defaults(self):
+        return [(self.name, self.default)]
+
+
+class CString(object):
+    """
+    A schema field stored as a NUL terminated ASCII string
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def defaults(self):
+        return [(self.name, "")]
+
+    def decoder(self):
+        name = self.name
+
+        def decode(chunk, raw, offset):
+            end = raw.find(b"\x00", offset)
+            if end < 0:
+                end = len(raw) - 1
+            object.__setattr__(chunk, name, raw[offset:end].decode())
+            return end + 1
+        return decode
+
+    def encoder(self):
+        name = self.name
+
+        def encode(chunk):
+            return getattr(chunk, name).encode("ascii") + b"\x00"
+        return encode
+
+
+class Text(CString):
+    """
+    A schema field stored as an ASCII string running to the end of the chunk.
+    It ends with a NUL when the flag attribute is set, anything after the first NUL is ignored.
+    """
+    def __init__(self, name, flag):
+        super(Text, self).__init__(name)
+        self.flag = flag
+
+    def defaults(self):
+        return [(self.flag, False), (self.name, "")]
+
+    def decoder(self):
+        name, flag = self.name, self.flag
+
+        def decode(chunk, raw, offset):
+            object.__setattr__(chunk, flag, raw[-1:] == b"\x00")
+            object.__setattr__(chunk, name, raw[offset:].split(b"\x00")[0].decode())
+            return len(raw)
+        return decode
+
+    def encoder(self):
+        name, flag = self.name, self.flag
+
+        def encode(chunk):
+            if getattr(chunk, flag):
+                return getattr(chunk, name).encode("ascii") + b"\x00"
+            return getattr(chunk, name).encode("ascii")
+        return encode
+
+
+class Padding(object):
+    """
+    Constant bytes in a schema, skipped when decoding
+    """
+    def __init__(self, padding):
+        self.padding = padding
+
+    @staticmethod
+    def defaults():
+        return []
+
+    def decoder(self):
+        size = len(self.padding)
+
+        def decode(chunk, raw, offset):
+            return offset + size
+        return decode
+
+    def encoder(self):
+        padding = self.padding
+
+        def encode(chunk):
+            return padding
+        return encode
+
+
+class Array(object):
+    """
+    A schema field stored as numpy array of dtype items with shape (N,) + shape filling the rest of the chunk.
+    Decoding copies the items into a writable array in one step. The class keeps the attribute an array of dtype,
+    see Poo2.array.
+    """
+    def __init__(self, name, dtype, shape=()):
+        self.name = name
+        self.dtype = numpy.dtype(dtype)
+        self.shape = shape
+        self.item_size = self.dtype.itemsize * int(numpy.prod(shape))
+
+    def defaults(self):
+        return [(self.name, numpy.zeros((0,) + self.shape, self.dtype))]
+
+    def decoder(self):
+        name, dtype, shape, item_size = self.name, self.dtype, (-1,) + self.shape, self.item_size
+        values_per_item = item_size // dtype.itemsize
+
+        def decode(chunk, raw, offset):
+            count = (len(raw) - offset) // item_size
+            if count * item_size != len(raw) - offset:
+                logging.error("Length of %s was not a multiple of %i!", name, item_size)
+            object.__setattr__(chunk, name,
+                               numpy.frombuffer(raw, dtype, count * values_per_item, offset).reshape(shape).copy())
+            return offset + count * item_size
+        return decode
+
+    def encoder(self):
+        name = self.name
+
+        def encode(chunk):
+            return getattr(chunk, name).tobytes()
+        return encode
+
+
+class Counted(Array):
+    """
+    A schema field stored as runs of items each prefixed by a uint16 item count, see split_counted.
+    The value is (offsets, items) with run i being items[offsets[i]:offsets[i + 1]].
+    With count_fmt the number of runs comes first, otherwise the runs fill the rest of the chunk.
+    Items must be 2 bytes, the dtype and shape are applied to them after splitting.
+    """
+    def __init__(self, name, dtype, shape=(), count_fmt=None):
+        super(Counted, self).__init__(name, dtype, shape)
+        if self.item_size != 2:
+            raise ValueError("Counted items must be 2 bytes")
+        self.count_struct = struct.Struct(count_fmt) if count_fmt else None
+
+    def defaults(self):
+        return [(self.name, (numpy.zeros(1, numpy.uint32), numpy.zeros((0,) + self.shape, self.dtype)))]
+
+    def decoder(self):
+        name, dtype, shape, count_struct = self.name, self.dtype, (-1,) + self.shape, self.count_struct
+        word_dtype = numpy.dtype(">u2")
+        as_words = dtype == word_dtype and not self.shape
+
+        def decode(chunk, raw, offset):
+            count = None
+            if count_struct:
+                count = count_struct.unpack_from(raw, offset)[0]
+                offset += count_struct.size
+            words = numpy.frombuffer(raw, word_dtype, (len(raw) - offset) // 2, offset)
+            try:
+                offsets, items = split_counted(words, count)
+            except ValueError as e:
+                raise ValueError("{}: {}".format(name, e)) from None
+            object.__setattr__(chunk, name, (offsets, items if as_words else items.view(dtype).reshape(shape)))
+            return len(raw)
+        return decode
+
+    def encoder(self):
+        name, count_struct = self.name, self.count_struct
+
+        def encode(chunk):
+            offsets, items = getattr(chunk, name)
+            words = join_counted(offsets, items).tobytes()
+            if count_struct:
+                return count_struct.pack(len(offsets) - 1) + words
+            return words
+        return encode
+
+
+class FixedRun(object):
+    # Consecutive Fixed fields of a ChunkSchema, compiled into one struct.Struct
+    def __init__(self, fields):
+        self.names = tuple(field.name for field in fields)
+        self.struct = struct.Struct(">" + "".join(field.fmt for field in fields))
+
+    def decoder(self):
+        names, unpack_from, size = self.names, self.struct.unpack_from, self.struct.size
+
+        def decode(chunk, raw, offset):
+            for name, value in zip(names, unpack_from(raw, offset)):
+                object.__setattr__(chunk, name, value)
+            return offset + size
+        return decode
+
+    def encoder(self):
+        pack, values = self.struct.pack, operator.attrgetter(*self.names)
+        if len(self.names) == 1:
+            def encode(chunk):
+                return pack(values(chunk))
+        else:
+            def encode(chunk):
+                return pack(*values(chunk))
+        return encode
+
+
+class ChunkSchema(object):
+    """
+    Declares the binary layout of a chunk as a list of Fixed, CString, Text, Padding, Array and Counted fields.
+    When the schema is created runs of Fixed fields are compiled into struct.Struct objects and every field into a
+    specialized decode and encode function, which SchemaChunk uses as its codec.
+
+    A schema is one fixed sequence of fields. Chunks that don't have one keep their hand-written codecs:
+    Strc picks one of several layouts by its version word (see Strc.detect_type), Atts is either a particle struct or
+    an array of entries depending on its size, Data stores its names and polygons in tables that frames index into
+    and that are deduplicated when encoding, and Body is raw bytes without fields.
+    """
+    def __init__(self, chunk_id, fields):
+        self.chunk_id = chunk_id
+        self.fields = fields
+        self.defaults = [default for field in fields for default in field.defaults()]
+        self.json_fields = [name for name, _ in self.defaults]
+
+        steps = []
+        fixed = []
+        for field in fields + [None]:
+            if isinstance(field, Fixed):
+                fixed.append(field)
+                continue
+            if fixed:
+                steps.append(FixedRun(fixed))
+                fixed = []
+            if field is not None:
+                steps.append(field)
+        self.decode = self._compile_decode([step.decoder() for step in steps],
+                                           any(isinstance(step, CString) for step in steps))
+        self.encode = self._compile_encode([step.encoder() for step in steps])
+        self.set_binary_data = self._compile_set_binary_data(self.decode)
+
+    @staticmethod
+    def _compile_decode(decoders, needs_bytes):
+        # Strings are searched for their NUL, which memoryview can't do
+        if len(decoders) == 1:
+            decoder = decoders[0]
+
+            def decode(chunk, binary_data):
+                chunk.mark_dirty()
+                decoder(chunk, bytes(binary_data) if needs_bytes else binary_data, 0)
+            return decode
+
+        def decode(chunk, binary_data):
+            chunk.mark_dirty()
+            raw = bytes(binary_data) if needs_bytes else binary_data
+            offset = 0
+            for step in decoders:
+                offset = step(chunk, raw, offset)
+        return decode
+
+    @staticmethod
+    def _compile_set_binary_data(decode):
+        def set_binary_data(chunk, binary_data, verifier=None):
+            # An empty chunk keeps the defaults
+            if len(binary_data):
+                decode(chunk, binary_data)
+                (verifier or round_trip).verify(chunk, binary_data)
+        return set_binary_data
+
+    @staticmethod
+    def _compile_encode(encoders):
+        if len(encoders) == 1:
+            return encoders[0]
+
+        def encode(chunk):
+            return b"".join([encoder(chunk) for encoder in encoders])
+        return encode
+
+
+schema_chunk_classes = []
+
+
+class SchemaChunk(Chunk):
+    """
+    Base for typed chunks whose codec is generated from their ChunkSchema.
+    Subclasses are added to master_list under their schema's chunk_id.
+    """
+    __slots__ = ()
+    schema = None  # type: ChunkSchema
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        schema_chunk_classes.append(cls)
+        # The compiled codec functions take the chunk as first argument, so they work as the methods themselves
+        if "set_binary_data" not in cls.__dict__:
+            cls.set_binary_data = cls.schema.set_binary_data
+        if "get_data" not in cls.__dict__:
+            cls.get_data = cls.schema.encode
+
+    def __init__(self, chunk_id=None):
+        super(SchemaChunk, self).__init__(chunk_id or self.schema.chunk_id)
+        # Fresh object with nothing to invalidate yet, so the defaults skip Node.__setattr__
+        for name, value in self.schema.defaults:
+            object.__setattr__(self, name, value)
+
+    def set_binary_data(self, binary_data, verifier=None):
+        self.schema.set_binary_data(self, binary_data, verifier)
+
+    def get_data(self):
+        return self.schema.encode(self)
+
+    def to_dict(self, version=1):
+        return {self.chunk_id: {name: getattr(self, name) for name in self.schema.json_fields}}
 
 
 class Amsh(Form):
+    __slots__ = ()
+
     def __init__(self, chunk_id="AMSH"):
         super(Amsh, self).__init__(chunk_id)
 
@@ -412,93 +1864,39 @@ class Amsh(Form):
 
     @property
     def get_texture_name(self):
-        return self.get_single("NAM2").to_class().name
+        return self.get_single("NAM2").view().name
 
     @property
     def get_polys(self):
-        return [x["poly_id"] for x in self.get_single("ATTS").to_class().atts_entries]
+        return self.get_single("ATTS").view().poly_ids().tolist()
 
     @property
     def get_uv_mapping(self):
-        olpl = self.get_single("OLPL").to_class()  # type: Olpl
-        olpl.normalize()
-        return olpl.points
+        olpl = self.get_single("OLPL").view()  # type: Olpl
+        return olpl.normalized_points()
 
 
-class Name(Chunk):
-    def __init__(self, chunk_id="NAME"):
-        super(Name, self).__init__(chunk_id)
-        self.zero_terminated = False
-        self.name = ""
+class Name(SchemaChunk):
+    # b"Skeleton/DUMMY.sklt\x00", b"VPfFLAK2", b"joh_mei_2.ade"
+    __slots__ = ("zero_terminated", "name")
+    schema = ChunkSchema("NAME", [Text("name", flag="zero_terminated")])
 
-    def set_binary_data(self, binary_data):
-        # binary_data = b"Skeleton/DUMMY.sklt\x00"
-        # binary_data = b"VPfFLAK2"
-        # binary_data = b"joh_mei_2.ade"
-        self.zero_terminated = binary_data[-1:] == b"\x00"
-        self.name = bytes(binary_data.split(b"\x00")[0]).decode()
-        assert binary_data == self.get_data()
 
-    def get_data(self):
-        ret = bytes(self.name, "ascii")
-        if self.zero_terminated:
-            return ret + b"\x00"
-        else:
-            return ret
-
-    def to_dict(self):
-        return {self.chunk_id: {"zero_terminated": self.zero_terminated,
-                                "name": self.name
-                                }
-                }
+class Clid(SchemaChunk):
+    # b"base.class\x00"
+    __slots__ = ("class_id", )
+    schema = ChunkSchema("CLID", [CString("class_id")])
 
 
-class Clid(Chunk):
-    def __init__(self, chunk_id="CLID"):
-        super(Clid, self).__init__(chunk_id)
-        self.class_id = ""
-
-    def set_binary_data(self, binary_data):
-        # binary_data = b"base.class\x00"
-        self.class_id = bytes(binary_data[:-1]).decode()
-        assert binary_data == self.get_data()
-
-    def get_data(self):
-        return bytes(self.class_id, "ascii") + b"\x00"
-
-    def to_dict(self):
-        return {self.chunk_id: {"class_id": self.class_id,
-                                }
-                }
-
-
-class Emrs(Chunk):
-    def __init__(self, chunk_id="EMRS"):
-        super(Emrs, self).__init__(chunk_id)
-        self.class_id = ""
-        self.emrs_name = ""
-
-    def set_binary_data(self, binary_data):
-        # binary_data = b"sklt.class\x00Skeleton/S00H.sklt\x00\x00"
-        if binary_data:
-            temp = binary_data.split(b"\x00")
-            self.class_id = bytes(temp[0]).decode()
-            self.emrs_name = bytes(temp[1]).decode()
-            assert binary_data == self.get_data()
-
-    def get_data(self):
-        return bytes(self.class_id, "ascii") + b"\x00" + bytes(self.emrs_name, "ascii") + b"\x00\x00"
-
-    def to_dict(self):
-        return {self.chunk_id: {"class_id": self.class_id,
-                                "emrs_name": self.emrs_name,
-                                }
-                }
+class Emrs(SchemaChunk):
+    # b"sklt.class\x00Skeleton/S00H.sklt\x00\x00"
+    __slots__ = ("class_id", "emrs_name")
+    schema = ChunkSchema("EMRS", [CString("class_id"), CString("emrs_name"), Padding(b"\x00")])
 
 
 class Nam2(Name):
-    def __init__(self, chunk_id="NAM2"):
-        super(Nam2, self).__init__(chunk_id)
+    __slots__ = ()
+    schema = ChunkSchema("NAM2", Name.schema.fields)
 
 
 class Data(Chunk):
@@ -526,152 +1924,174 @@ class Data(Chunk):
     00000FA0 0000 0001
 
     00
+
+    Chunks loaded from version 2 JSON keep its tables, like Poo2.points they are what gets encoded until frames is
+    first used.
     """
+    __slots__ = ("class_id", "_frames", "_tables")
+    ushort_struct = struct.Struct(">H")
+    frame_struct = struct.Struct(">IHH")
 
     def __init__(self, chunk_id="DATA"):
         super(Data, self).__init__(chunk_id)
         self.class_id = ""
         self.frames = []
 
-    def set_binary_data(self, binary_data):
-        vanm_data = binary_data
-        # vanm_data_len = len(vanm_data)
+    @property
+    def frames(self):
+        """
+        :rtype: list[dict]
+        """
+        if self._frames is None:
+            tables = self._tables
+            vbmp_names = tables["vbmp_names"]
+            polygons = [[list(xy) for xy in zip(polygon[0::2], polygon[1::2])] for polygon in tables["polygons"]]
+            object.__setattr__(self, "_frames", [{"frame_time": frame_time,
+                                                  "vbmp_name": vbmp_names[file_idx],
+                                                  "vbmp_coords": polygons[polygon_idx],
+                                                  } for frame_time, file_idx, polygon_idx in
+                                                 zip(tables["frame_time"], tables["vbmp_name"], tables["polygon"])])
+            object.__setattr__(self, "_tables", None)
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames):
+        object.__setattr__(self, "_frames", frames)
+        object.__setattr__(self, "_tables", None)
+        self.mark_dirty()
+
+    def set_binary_data(self, binary_data, verifier=None):
+        vanm_data = memoryview(binary_data)
+        read_ushort = self.ushort_struct.unpack_from
 
         idx = 0
         # Handle the source class ID, it's safer than just stepping +13
-        source_class_id_len = struct.unpack(">H", vanm_data[idx:idx + 2])[0]
+        source_class_id_len = read_ushort(vanm_data, idx)[0]
         idx += 2
-        self.class_id = bytes(vanm_data[idx:idx + source_class_id_len].strip(b"\x00")).decode()
+        self.class_id = bytes(vanm_data[idx:idx + source_class_id_len]).strip(b"\x00").decode()
         idx += source_class_id_len
 
-        # Get length of VBMP file names (ALL names)
-        vbmp_fnames_len = struct.unpack(">H", vanm_data[idx:idx + 2])[0]
+        # Get length of VBMP file names (ALL names) and split them
+        vbmp_fnames_len = read_ushort(vanm_data, idx)[0]
         idx += 2
-
-        # Split the names
-        vbmp_fnames = bytes(vanm_data[idx:idx + vbmp_fnames_len].strip(b"\x00")).decode().split("\x00")
+        vbmp_fnames = bytes(vanm_data[idx:idx + vbmp_fnames_len]).strip(b"\x00").decode().split("\x00")
         idx += vbmp_fnames_len
 
-        num_shorts_for_polygons = struct.unpack(">H", vanm_data[idx:idx + 2])[0]
+        # Read all polygons, num_verts followed by that many (x, y) byte pairs each
+        num_shorts_for_polygons = read_ushort(vanm_data, idx)[0]
         idx += 2
-        polygons_len = 2 * num_shorts_for_polygons
-
-        # Read all polygons
+        polygon_bytes = bytes(vanm_data[idx:idx + 2 * num_shorts_for_polygons])
+        idx += 2 * num_shorts_for_polygons
         vanm_polygons = []
-        polygons_start = idx
-        while idx < polygons_start + polygons_len:
-
-            # Get number of vertices in this polygon
-            temp_num_vertices = struct.unpack(">H", vanm_data[idx:idx + 2])[0]
-            idx += 2
-            # Read that many vertices
-            p = 0
-            temp_polygon = []
-            while p < temp_num_vertices:
-                v = struct.unpack(">BB", vanm_data[
-                                         idx:idx + 2])  # Unpack (x,y) pair of unsigned bytes (NOTE: tuple format is fine!)
-                temp_polygon.append(list(v))  # Add the pair to the polygon
-                p += 1
-                idx += 2
-
-            vanm_polygons.append(temp_polygon)  # Now we have a list of ((x1,y1), (x2,y2), (x2,y2)...) sets
-
-        # Read the number of frames
-        vanm_num_frames = struct.unpack(">H", vanm_data[idx:idx + 2])[0]
+        p = 0
+        while p < len(polygon_bytes):
+            coords_end = p + 2 + 2 * read_ushort(polygon_bytes, p)[0]
+            vanm_polygons.append([list(xy) for xy in zip(polygon_bytes[p + 2:coords_end:2],
+                                                         polygon_bytes[p + 3:coords_end:2])])
+            p = coords_end
+
+        # Read and construct all frames, picking VBMP name, coordinates and duration
+        vanm_num_frames = read_ushort(vanm_data, idx)[0]
         idx += 2
+        frames_end = idx + vanm_num_frames * self.frame_struct.size
+        self.frames = [{"frame_time": frame_time,
+                        "vbmp_name": vbmp_fnames[file_idx],
+                        "vbmp_coords": vanm_polygons[polygon_idx],
+                        } for frame_time, file_idx, polygon_idx in self.frame_struct.iter_unpack(vanm_data[idx:frames_end])]
+        (verifier or round_trip).verify(self, binary_data)
+
+    def _index_frames(self):
+        """
+        Numbers VBMP names and polygons in order of first use, identical polygons share one number
 
-        # Read and construct all frames
-        f = 0
-        while f < vanm_num_frames:
-            temp_frame_time = struct.unpack(">I", vanm_data[idx:idx + 4])[0]
-            temp_frame_file_idx = struct.unpack(">H", vanm_data[idx + 4:idx + 6])[0]
-            temp_frame_polygon_idx = struct.unpack(">H", vanm_data[idx + 6:idx + 8])[0]
-            idx += 8
-            f += 1
+        :return: (vbmp names, polygons as flat x, y tuples, frames as (frame_time, name index, polygon index))
+        :rtype: tuple[list[str], list[tuple], list[tuple[int, int, int]]]
+        """
+        vbmp_names = {}
+        polygons = {}
+        frames = [(frame["frame_time"],
+                   vbmp_names.setdefault(frame["vbmp_name"], len(vbmp_names)),
+                   polygons.setdefault(tuple(coordinate for xy in frame["vbmp_coords"] for coordinate in xy),
+                                       len(polygons)))
+                  for frame in self.frames]
+        return list(vbmp_names), list(polygons), frames
 
-            # Build a new frame object - pick VBMP name, coordinates and set duration
-            temp_vframe = {"frame_time": temp_frame_time,
-                           "vbmp_name": vbmp_fnames[temp_frame_file_idx],
-                           "vbmp_coords": vanm_polygons[temp_frame_polygon_idx],
-                           }
+    @property
+    def tables(self):
+        """
+        frames as tables, how version 2 JSON stores them: every VBMP name and polygon (flat x, y list) once, numbered
+        like get_data() does, and a list per frame field with the names and polygons as indices
 
-            self.frames.append(temp_vframe)
+        :rtype: dict[str, list]
+        """
+        if self._tables is not None:
+            return self._tables
+        vbmp_names, polygons, frames = self._index_frames()
+        frame_time, vbmp_name, polygon = zip(*frames) if frames else ((), (), ())
+        return {"vbmp_names": vbmp_names,
+                "polygons": [list(polygon) for polygon in polygons],
+                "frame_time": list(frame_time),
+                "vbmp_name": list(vbmp_name),
+                "polygon": list(polygon),
+                }
 
-        return None
+    @tables.setter
+    def tables(self, tables):
+        object.__setattr__(self, "_tables", tables)
+        object.__setattr__(self, "_frames", None)
+        self.mark_dirty()
 
     def get_data(self):
-        class_id = self.class_id + "\x00"
-        vbmp_names = []
-        poly = []
-        frame_times = []
-        for frame in self.frames:
-            poly.append(frame["vbmp_coords"])
-            if frame["vbmp_name"] not in vbmp_names:
-                vbmp_names.append(frame["vbmp_name"])
-            frame_times.append([frame["frame_time"],
-                                vbmp_names.index(frame["vbmp_name"]),
-                                poly.index(frame["vbmp_coords"])])
+        tables = self._tables
+        if tables is None:
+            vbmp_names, polygons, frames = self._index_frames()
+        else:
+            vbmp_names, polygons = tables["vbmp_names"], tables["polygons"]
+            frames = zip(tables["frame_time"], tables["vbmp_name"], tables["polygon"])
+        frame_bytes = [self.frame_struct.pack(*frame) for frame in frames]
 
+        pack_ushort = self.ushort_struct.pack
+        class_id = bytes(self.class_id + "\x00", "ascii")
         vbmp_names_bytes = bytes("\x00".join(vbmp_names), "ascii") + b"\x00\x00"
+        poly_bytes = b"".join(pack_ushort(len(polygon) // 2) + bytes(polygon) for polygon in polygons)
 
-        poly_bytes = b""
-        for pol in poly:
-            poly_bytes += struct.pack(">H", len(pol))
-            for po in pol:
-                for p in po:
-                    poly_bytes += struct.pack(">B", p)
+        return b"".join([pack_ushort(len(class_id)), class_id,
+                         pack_ushort(len(vbmp_names_bytes)), vbmp_names_bytes,
+                         pack_ushort(len(poly_bytes) // 2), poly_bytes,
+                         pack_ushort(len(frame_bytes))] + frame_bytes)
 
-        frame_times_bytes = b"".join([struct.pack(">I", x[0]) + struct.pack(">H", x[1]) + struct.pack(">H", x[2]) for x in frame_times])
-        a = struct.pack(">H", len(class_id)) + bytes(class_id, "ascii") + struct.pack(">H", len(vbmp_names_bytes)) + vbmp_names_bytes + struct.pack(">H", int(len(poly_bytes) / 2)) + poly_bytes + struct.pack(">H", len(frame_times)) + frame_times_bytes
-        return a
-
-    def to_dict(self):
+    def to_dict(self, version=1):
+        if version == 2:
+            return {self.chunk_id: {"class_id": self.class_id,
+                                    "tables": self.tables,
+                                    }
+                    }
         return {self.chunk_id: {"class_id": self.class_id,
                                 "frames": self.frames,
                                 }
                 }
 
 
-class Head(Chunk):
-    def __init__(self, chunk_id="HEAD"):
-        super(Head, self).__init__(chunk_id)
-        self.width = 0
-        self.height = 0
-        self.flags = 0
-
-    def set_binary_data(self, binary_data):
-        if binary_data:
-            width, height, flags = struct.unpack(">HHH", binary_data)
-            self.width = width
-            self.height = height
-            self.flags = flags
-            assert binary_data == self.get_data()
-
-    def get_data(self):
-        return struct.pack(">HHH",
-                           self.width, self.height, self.flags)
-
-    def to_dict(self):
-        return {self.chunk_id: {"width": self.width,
-                                "height": self.height,
-                                "flags": self.flags,
-                                }
-                }
+class Head(SchemaChunk):
+    __slots__ = ("width", "height", "flags")
+    schema = ChunkSchema("HEAD", [Fixed("width", "H"), Fixed("height", "H"), Fixed("flags", "H")])
 
 
 class Body(Chunk):
+    __slots__ = ()
+
     def __init__(self, chunk_id="BODY"):
         super(Body, self).__init__(chunk_id)
         self.data = bytes()
 
-    def set_binary_data(self, binary_data):
+    def set_binary_data(self, binary_data, verifier=None):
         self.data = binary_data
-        assert binary_data == self.get_data()
+        (verifier or round_trip).verify(self, binary_data)
 
     def get_data(self):
         return self.data
 
-    def to_dict(self):
+    def to_dict(self, version=1):
         return {self.chunk_id: {"data": base64.b64encode(self.get_data()).decode("ascii")}}
 
     def from_json_generic(self, json_string):
@@ -684,10 +2104,32 @@ class Body(Chunk):
 # https://github.com/Marisa-Chan/UA_source/blob/master/src/amesh.cpp#L262
 # Particle.class has its own binary format https://github.com/Marisa-Chan/UA_source/blob/master/src/particle.cpp#L681
 class Atts(Chunk):
+    """
+    Polygon attributes are kept in entries, a structured array with the atts_dtype fields.
+    atts_entries is the same data as a list of dicts, built on first access.
+    Like Poo2.points that list is what gets encoded until entries is used again.
+    """
+    __slots__ = ("is_particle_atts", "_entries", "_atts_entries",
+                 # Particle ATTS
+                 "version",
+                 "accel_start_x", "accel_start_y", "accel_start_z",
+                 "accel_end_x", "accel_end_y", "accel_end_z",
+                 "magnify_start_x", "magnify_start_y", "magnify_start_z",
+                 "magnify_end_x", "magnify_end_y", "magnify_end_z",
+                 "collide", "start_speed",
+                 "context_number", "context_life_time",
+                 "context_start_gen", "context_stop_gen",
+                 "gen_rate", "lifetime",
+                 "start_size", "end_size", "noise")
+    atts_dtype = numpy.dtype([("poly_id", ">i2"), ("color_val", "u1"), ("shade_val", "u1"), ("tracy_val", "u1"),
+                              ("pad", "u1")])
+    particle_struct = struct.Struct(">hfffffffffffflllllllllll")
+    particle_fields = __slots__[3:]
+
     def __init__(self, chunk_id="ATTS"):
         super(Atts, self).__init__(chunk_id)
         self.is_particle_atts = False
-        self.atts_entries = []
+        self.entries = numpy.zeros(0, self.atts_dtype)
 
     @staticmethod
     def atts_entry(poly_id=0, color_val=0, shade_val=0, tracy_val=0, pad=0):
@@ -698,48 +2140,83 @@ class Atts(Chunk):
                 "pad": pad,
                 }
 
+    @property
+    def entries(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        if self._atts_entries is not None:
+            entries = [tuple(atts[name] for name in self.atts_dtype.names) for atts in self._atts_entries]
+            object.__setattr__(self, "_entries", numpy.array(entries, self.atts_dtype))
+            object.__setattr__(self, "_atts_entries", None)
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        object.__setattr__(self, "_entries", numpy.asarray(entries, self.atts_dtype).reshape(-1))
+        object.__setattr__(self, "_atts_entries", None)
+
+    @property
+    def atts_entries(self):
+        """
+        :rtype: list[dict]
+        """
+        if self._atts_entries is None:
+            object.__setattr__(self, "_atts_entries", self._entries_as_dicts())
+        return self._atts_entries
+
+    @atts_entries.setter
+    def atts_entries(self, atts_entries):
+        object.__setattr__(self, "_atts_entries", list(atts_entries))
+
+    @property
+    def columns(self):
+        """
+        The entries as one list per atts_dtype field, how version 2 JSON stores them
+
+        :rtype: dict[str, list[int]]
+        """
+        entries = self.entries
+        return {name: entries[name].tolist() for name in self.atts_dtype.names}
+
+    @columns.setter
+    def columns(self, columns):
+        entries = numpy.zeros(len(columns["poly_id"]), self.atts_dtype)
+        for name, values in columns.items():
+            entries[name] = values
+        self.entries = entries
+
+    def _entries_as_dicts(self):
+        names = self.atts_dtype.names
+        return [dict(zip(names, entry)) for entry in self._entries.tolist()]
+
+    def poly_ids(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self.entries["poly_id"]
+
+    def polys_without_atts(self, poly_count):
+        """
+        Sorted polygon indices below poly_count that have no entry
+
+        :rtype: numpy.ndarray
+        """
+        poly_ids = self.poly_ids()
+        missing = numpy.ones(poly_count, bool)
+        missing[poly_ids[(poly_ids >= 0) & (poly_ids < poly_count)]] = False
+        return numpy.flatnonzero(missing)
+
     def _set_binary_data_particle(self, binary_data):
         self.is_particle_atts = True
-        (version,
-         accel_start_x, accel_start_y, accel_start_z,
-         accel_end_x, accel_end_y, accel_end_z,
-         magnify_start_x, magnify_start_y, magnify_start_z,
-         magnify_end_x, magnify_end_y, magnify_end_z,
-         collide, start_speed,
-         context_number, context_life_time,
-         context_start_gen, context_stop_gen,
-         gen_rate, lifetime,
-         start_size, end_size, noise) = struct.unpack(">hfffffffffffflllllllllll", binary_data)
-
-        self.version = version
-        self.accel_start_x = accel_start_x
-        self.accel_start_y = accel_start_y
-        self.accel_start_z = accel_start_z
-        self.accel_end_x = accel_end_x
-        self.accel_end_y = accel_end_y
-        self.accel_end_z = accel_end_z
-        self.magnify_start_x = magnify_start_x
-        self.magnify_start_y = magnify_start_y
-        self.magnify_start_z = magnify_start_z
-        self.magnify_end_x = magnify_end_x
-        self.magnify_end_y = magnify_end_y
-        self.magnify_end_z = magnify_end_z
-        self.collide = collide
-        self.start_speed = start_speed
-        self.context_number = context_number
-        self.context_life_time = context_life_time
-        self.context_start_gen = context_start_gen
-        self.context_stop_gen = context_stop_gen
-        self.gen_rate = gen_rate
-        self.lifetime = lifetime
-        self.start_size = start_size
-        self.end_size = end_size
-        self.noise = noise
-
-    def set_binary_data(self, binary_data):
-        if len(binary_data) == 94:
+        for name, value in zip(self.particle_fields, self.particle_struct.unpack(binary_data)):
+            setattr(self, name, value)
+
+    def set_binary_data(self, binary_data, verifier=None):
+        verifier = verifier or round_trip
+        if len(binary_data) == self.particle_struct.size:
             self._set_binary_data_particle(binary_data)
-            assert binary_data[0:len(self.get_data())] == self.get_data()
+            verifier.verify(self, binary_data, prefix=True)
             return
 
         if len(binary_data) % 6 != 0:
@@ -748,99 +2225,47 @@ class Atts(Chunk):
                           "Size: %i" % len(binary_data))
 
         self.is_particle_atts = False
-        poly_cnt = int(len(binary_data) / 6)
-        atts_entries = []
-
-        for i in range(poly_cnt):
-            offset = int(i * 6)
-
-            poly_id, color_val, shade_val, tracy_val, pad = struct.unpack(">hBBBB", binary_data[offset:offset + 6])
-
-            new_atts_entry = self.atts_entry(poly_id, color_val, shade_val, tracy_val, pad)
-            atts_entries.append(new_atts_entry)
-
-        self.atts_entries = atts_entries
-        assert binary_data[0:len(self.get_data())] == self.get_data()
+        self.entries = numpy.frombuffer(binary_data, self.atts_dtype, count=len(binary_data) // 6)
+        verifier.verify(self, binary_data, prefix=True)
 
     def _get_data_particle(self):
-        return struct.pack(">hfffffffffffflllllllllll",
-                           self.version,
-                           self.accel_start_x,
-                           self.accel_start_y,
-                           self.accel_start_z,
-                           self.accel_end_x,
-                           self.accel_end_y,
-                           self.accel_end_z,
-                           self.magnify_start_x,
-                           self.magnify_start_y,
-                           self.magnify_start_z,
-                           self.magnify_end_x,
-                           self.magnify_end_y,
-                           self.magnify_end_z,
-                           self.collide, self.start_speed,
-                           self.context_number, self.context_life_time,
-                           self.context_start_gen, self.context_stop_gen,
-                           self.gen_rate, self.lifetime,
-                           self.start_size, self.end_size,
-                           self.noise)
+        return self.particle_struct.pack(*[getattr(self, name) for name in self.particle_fields])
 
     def get_data(self):
         if self.is_particle_atts:
             return self._get_data_particle()
 
-        ret = bytes()
-
-        for atts in self.atts_entries:
-            ret += struct.pack(">hBBBB",
-                               atts["poly_id"],
-                               atts["color_val"], atts["shade_val"],
-                               atts["tracy_val"], atts["pad"])
-
-        return ret
+        return self.entries.tobytes()
 
     def _to_json_particle(self):
+        ret = {"is_particle_atts": self.is_particle_atts}
+        values = [getattr(self, name) for name in self.particle_fields]
+        values[1:13] = float32_tolist(values[1:13])
+        ret.update(zip(self.particle_fields, values))
+        return {self.chunk_id: ret}
+
+    def _to_json_generic(self, version):
+        if version == 2:
+            return {self.chunk_id: {"is_particle_atts": self.is_particle_atts,
+                                    "columns": self.columns,
+                                    }
+                    }
+        atts_entries = self._atts_entries if self._atts_entries is not None else self._entries_as_dicts()
         return {self.chunk_id: {"is_particle_atts": self.is_particle_atts,
-                                "version": self.version,
-                                "accel_start_x": self.accel_start_x,
-                                "accel_start_y": self.accel_start_y,
-                                "accel_start_z": self.accel_start_z,
-                                "accel_end_x": self.accel_end_x,
-                                "accel_end_y": self.accel_end_y,
-                                "accel_end_z": self.accel_end_z,
-                                "magnify_start_x": self.magnify_start_x,
-                                "magnify_start_y": self.magnify_start_y,
-                                "magnify_start_z": self.magnify_start_z,
-                                "magnify_end_x": self.magnify_end_x,
-                                "magnify_end_y": self.magnify_end_y,
-                                "magnify_end_z": self.magnify_end_z,
-                                "collide": self.collide,
-                                "start_speed": self.start_speed,
-                                "context_number": self.context_number,
-                                "context_life_time": self.context_life_time,
-                                "context_start_gen": self.context_start_gen,
-                                "context_stop_gen": self.context_stop_gen,
-                                "gen_rate": self.gen_rate,
-                                "lifetime": self.lifetime,
-                                "start_size": self.start_size,
-                                "end_size": self.end_size,
-                                "noise": self.noise,
-                                }
-                }
-
-    def _to_json_generic(self):
-        return {self.chunk_id: {"is_particle_atts": self.is_particle_atts,
-                                "atts_entries": self.atts_entries,
+                                "atts_entries": atts_entries,
                                 }
                 }
 
-    def to_dict(self):
+    def to_dict(self, version=1):
         if self.is_particle_atts:
             return self._to_json_particle()
 
-        return self._to_json_generic()
+        return self._to_json_generic(version)
 
 
 class Vector:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x=0.0, y=0.0, z=0.0):
         self.x = x
         self.y = y
@@ -855,220 +2280,500 @@ class Vector:
         return "Vector({}, {}, {})".format(self.x, self.y, self.z)
 
 
+# Whole float32 values below this are exact and print as short widened to float64 as they do as float32
+float32_whole_limit = 2 ** 24
+
+
+def float32_tolist(values):
+    """
+    Like numpy.ndarray.tolist() for float32 values, but each float is the shortest decimal that rounds back to the
+    same float32, so JSON gets 0.3 rather than the widened 0.30000001192092896. Packing the floats with ">f" again
+    gives back the original bits.
+
+    :rtype: list
+    """
+    array = numpy.asarray(values, numpy.float32)
+    widened = array.astype(numpy.float64)
+    # Small whole numbers, most of the game data, already print short. Large ones like 3.4e38 widen to
+    # 3.3999999521443642e+38 and need the conversion as well.
+    convert = (widened != numpy.trunc(widened)) | (numpy.abs(widened) >= float32_whole_limit)
+    if convert.any():
+        widened[convert] = array[convert].astype(str).astype(numpy.float64)
+    return widened.tolist()
+
+
 # https://github.com/Marisa-Chan/UA_source/blob/44bb2284bf15fd55085ccca160d5bc2f6032e345/src/sklt.cpp#L128
-class Poo2(Chunk):
-    def __init__(self, chunk_id="POO2"):
-        super(Poo2, self).__init__(chunk_id)
-        self.points = []
+class Poo2(SchemaChunk):
+    """
+    Points are kept in array, an (N, 3) big endian float32 array like the chunk stores them.
+    points is the same data as a list of {"x", "y", "z"} dicts, built on first access.
+    Until array is used again that list is what gets encoded, so it can still be edited in place. Encoding, to_dict
+    and the points_as_* accessors only read it.
+    """
+    __slots__ = ("_array", "_points")
+    dtype = numpy.dtype(">f4")
+    schema = ChunkSchema("POO2", [Array("array", dtype, (3, ))])
+
+    @property
+    def array(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        if self._points is not None:
+            object.__setattr__(self, "_array", self._current_array())
+            object.__setattr__(self, "_points", None)
+        return self._array
+
+    def _current_array(self):
+        # The points as array without making array the one that is edited, so points handed out stay live
+        if self._points is not None:
+            return numpy.array([(point["x"], point["y"], point["z"]) for point in self._points],
+                               self.dtype).reshape(-1, 3)
+        return self._array
+
+    def get_data(self):
+        return self._current_array().tobytes()
+
+    @array.setter
+    def array(self, array):
+        object.__setattr__(self, "_array", numpy.asarray(array, self.dtype).reshape(-1, 3))
+        object.__setattr__(self, "_points", None)
+
+    @property
+    def points(self):
+        """
+        :rtype: list[dict]
+        """
+        if self._points is None:
+            object.__setattr__(self, "_points", [{"x": x, "y": y, "z": z} for x, y, z in float32_tolist(self._array)])
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        object.__setattr__(self, "_points", list(points))
+        object.__setattr__(self, "_array", None)
+
+    @property
+    def xyz(self):
+        """
+        x, y, z of all points in one flat list, how version 2 JSON stores them
+
+        :rtype: list[float]
+        """
+        return float32_tolist(self._current_array().reshape(-1))
+
+    @xyz.setter
+    def xyz(self, xyz):
+        self.array = numpy.array(xyz, self.dtype)
 
     def scale_down(self, scaling_factor):
-        self.points = [{"x": point["x"] / scaling_factor,
-                        "y": point["y"] / scaling_factor,
-                        "z": point["z"] / scaling_factor} for point in self.points]
+        self.array = self.array / scaling_factor
 
     def scale_up(self, scaling_factor):
         self.scale_down(1 / scaling_factor)
 
     def change_coordinate_system(self):
-        self.points = [{"x": point["x"] * -1,
-                        "y": point["z"] * -1,
-                        "z": point["y"] * -1} for point in self.points]
+        self.array = -self.array[:, [0, 2, 1]]
 
     def points_as_list(self):
-        return [[point["x"], point["y"], point["z"]] for point in self.points]  # No Test Coverage
+        return self._current_array().tolist()
 
     def points_as_flattened_list(self):
-        return [item for sublist in self.points_as_list() for item in sublist]  # No Test Coverage
+        return self._current_array().ravel().tolist()  # No Test Coverage
 
     def set_points_from_list(self, points):
-        self.points = [{"x": x,
-                        "y": y,
-                        "z": z} for x, y, z in points]  # No Test Coverage
+        self.array = numpy.array(points, self.dtype)  # No Test Coverage
 
     def round_points(self):
-        self.points = [{"x": round(point["x"]),
-                        "y": round(point["y"]),
-                        "z": round(point["z"])} for point in self.points]  # No Test Coverage
+        self.array = numpy.round(self.array)  # No Test Coverage
 
     def points_as_vectors(self):
-        return [Vector(*xyz) for xyz in self.points_as_list()]
+        return [Vector(*xyz) for xyz in self._current_array().tolist()]
 
-    def set_binary_data(self, binary_data):
-        if len(binary_data) % 12 != 0:  # No Test Coverage
-            logging.error("Poo2.convert_binary_data(): Length of binary data was not a multiple of 12!")
+    def to_dict(self, version=1):
+        if version == 2:
+            return {self.chunk_id: {"xyz": self.xyz,
+                                    }
+                    }
+        if self._points is not None:
+            return {self.chunk_id: {"points": self._points,
+                                    }
+                    }
+        return {self.chunk_id: {"points": [{"x": x, "y": y, "z": z} for x, y, z in float32_tolist(self._array)],
+                                }
+                }
 
-        num = int(len(binary_data) / 12)
-        poo2_points = []
 
-        for i in range(num):
-            offset = int(i * 12)
+class Sen2(Poo2):
+    __slots__ = ()
+    schema = ChunkSchema("SEN2", Poo2.schema.fields)
 
-            x, y, z = struct.unpack(">fff", binary_data[offset:offset + 12])
-            new_poo2_point = {"x": x,
-                              "y": y,
-                              "z": z}
-            poo2_points.append(new_poo2_point)
 
-            self.points = poo2_points
-        assert binary_data == self.get_data()
+def split_counted(words, count=None):
+    """
+    Splits big endian uint16 words laid out as [n, n items, n, n items, ...] like POL2 and OLPL store them.
+    With count None the runs continue to the end of words.
+    Only the positions of the counts are walked, everything else is done in bulk.
 
-    def get_data(self):
-        ret = bytes()
-        for point in self.points:
-            ret += struct.pack(">fff", point["x"], point["y"], point["z"])
+    :return: (offsets, items) with run i being items[offsets[i]:offsets[i + 1]]
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    values = words.tolist()
+    count_positions = []
+    position = 0
+    while (position < len(values)) if count is None else (len(count_positions) < count):
+        if position >= len(values):
+            raise ValueError("Run {} is truncated".format(len(count_positions)))
+        count_positions.append(position)
+        position += values[position] + 1
+    if position > len(values):
+        raise ValueError("Run {} is truncated".format(len(count_positions) - 1))
+
+    count_positions = numpy.array(count_positions, numpy.intp)
+    is_item = numpy.ones(position, bool)
+    is_item[count_positions] = False
+    return counted_offsets(words[count_positions]), words[:position][is_item]
+
+
+def counted_offsets(counts):
+    """
+    Offsets like split_counted returns them for runs of the given lengths
 
-        return ret
+    :rtype: numpy.ndarray
+    """
+    offsets = numpy.zeros(len(counts) + 1, numpy.uint32)
+    numpy.cumsum(counts, out=offsets[1:])
+    return offsets
 
-    def to_dict(self):
-        return {self.chunk_id: {"points": self.points,
-                                }
-                }
 
+def join_counted(offsets, items):
+    """
+    The reverse of split_counted, items can be any 2 byte dtype
 
-class Sen2(Poo2):
-    def __init__(self, chunk_id="SEN2"):
-        super(Sen2, self).__init__(chunk_id)
+    :rtype: numpy.ndarray
+    """
+    run_count = len(offsets) - 1
+    if run_count < 0 or offsets[-1] != len(items):
+        raise ValueError("offsets must end at len(items) (%i), not %s" % (len(items), offsets[-1:]))
+    words = numpy.empty(run_count + len(items), ">u2")
+    count_positions = offsets[:-1] + numpy.arange(run_count, dtype=numpy.uint32)
+    is_item = numpy.ones(len(words), bool)
+    is_item[count_positions] = False
+    words[count_positions] = numpy.diff(offsets)
+    words[is_item] = numpy.ascontiguousarray(items).view(">u2").reshape(-1)
+    return words
 
 
 # https://github.com/Marisa-Chan/UA_source/blob/44bb2284bf15fd55085ccca160d5bc2f6032e345/src/sklt.cpp#L207
-class Pol2(Chunk):
-    def __init__(self, chunk_id="POL2"):
-        super(Pol2, self).__init__(chunk_id)
-        self.edges = []
+class Pol2(SchemaChunk):
+    """
+    Polygons are kept as offsets, a uint32 array with polygon i being indices[offsets[i]:offsets[i + 1]],
+    and indices, the big endian uint16 vertex indices of all polygons one after the other.
+    edges is the same data as a list of index lists, built on first access.
+    Like Poo2.points that list is what gets encoded until offsets or indices are used again.
+    """
+    __slots__ = ("_offsets", "_indices", "_edges")
+    index_dtype = numpy.dtype(">u2")
+    schema = ChunkSchema("POL2", [Counted("polygons", index_dtype, count_fmt=">I")])
 
-    def set_binary_data(self, binary_data):
-        offset = 0
-        pol2_edges = []
+    @property
+    def offsets(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        self._edges_to_arrays()
+        return self._offsets
+
+    @property
+    def indices(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        self._edges_to_arrays()
+        return self._indices
+
+    @indices.setter
+    def indices(self, indices):
+        self._edges_to_arrays()
+        object.__setattr__(self, "_indices", numpy.asarray(indices, self.index_dtype))
+
+    @property
+    def counts(self):
+        """
+        Number of indices of every polygon, how version 2 JSON stores the polygons together with indices
+
+        :rtype: numpy.ndarray
+        """
+        return numpy.diff(self.offsets)
+
+    @counts.setter
+    def counts(self, counts):
+        self._edges_to_arrays()
+        object.__setattr__(self, "_offsets", counted_offsets(counts))
 
-        pol_count = int(struct.unpack(">I", binary_data[0:4])[0])
-        offset += 4
+    @property
+    def polygons(self):
+        """
+        (offsets, indices)
+
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        return self.offsets, self.indices
+
+    @polygons.setter
+    def polygons(self, polygons):
+        self.set_polygons(*polygons)
+
+    def set_polygons(self, offsets, indices):
+        offsets = numpy.asarray(offsets, numpy.uint32)
+        indices = numpy.asarray(indices, self.index_dtype)
+        if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(indices):
+            raise ValueError("Pol2 offsets must start at 0 and end at len(indices)")
+        object.__setattr__(self, "_offsets", offsets)
+        object.__setattr__(self, "_indices", indices)
+        object.__setattr__(self, "_edges", None)
+        self.mark_dirty()
+
+    def _edges_to_arrays(self):
+        edges = self._edges
+        if edges is None:
+            return
+        offsets = counted_offsets(numpy.fromiter((len(polygon) for polygon in edges), numpy.uint32, len(edges)))
+        indices = numpy.fromiter((index for polygon in edges for index in polygon), self.index_dtype, int(offsets[-1]))
+        object.__setattr__(self, "_offsets", offsets)
+        object.__setattr__(self, "_indices", indices)
+        object.__setattr__(self, "_edges", None)
+
+    @property
+    def edges(self):
+        """
+        :rtype: list[list[int]]
+        """
+        if self._edges is None:
+            object.__setattr__(self, "_edges", self._arrays_to_edges())
+        return self._edges
 
-        for i in range(pol_count):
-            num_vertex = struct.unpack(">H", binary_data[offset + 0:offset + 2])[0]
-            offset += 2
-            new_vertex = []
-            for j in range(num_vertex):
-                new_vertex.append(struct.unpack(">H", binary_data[offset + 0:offset + 2])[0])
-                offset += 2
-            pol2_edges.append(new_vertex)
+    @edges.setter
+    def edges(self, edges):
+        object.__setattr__(self, "_edges", list(edges))
 
-        self.edges = pol2_edges
-        assert binary_data == self.get_data()
+    def _arrays_to_edges(self):
+        indices = self._indices.tolist()
+        offsets = self._offsets.tolist()
+        return [indices[start:stop] for start, stop in zip(offsets, offsets[1:])]
 
     def get_data(self):
-        ret = struct.pack(">I", len(self.edges))
-        for pol2 in self.edges:
-            ret += struct.pack(">H", len(pol2))
-            if len(pol2) > GFX_MAX_VERTEX:
+        offsets = self.offsets
+        if len(offsets) > 1:
+            # For the few polygons of a chunk the overhead of numpy.diff costs more than the subtraction itself
+            counts = offsets[1:] - offsets[:-1]
+            if counts.max() > GFX_MAX_VERTEX:
                 raise ValueError("Too many faces in polygon detected ({}). Max number of faces per polygon is 12. "
-                                 "Check GFX_MAX_VERTEX in engine_gfx.h".format(len(pol2)))
-            for coordinate in pol2:
-                ret += struct.pack(">H", coordinate)
-
-        return ret
+                                 "Check GFX_MAX_VERTEX in engine_gfx.h".format(counts[counts > GFX_MAX_VERTEX][0]))
+        return self.schema.encode(self)
 
-    def to_dict(self):
-        return {self.chunk_id: {"edges": self.edges,
+    def to_dict(self, version=1):
+        if version == 2:
+            return {self.chunk_id: {"counts": self.counts.tolist(),
+                                    "indices": self.indices.tolist(),
+                                    }
+                    }
+        if self._edges is not None:
+            return {self.chunk_id: {"edges": self._edges,
+                                    }
+                    }
+        return {self.chunk_id: {"edges": self._arrays_to_edges(),
                                 }
                 }
 
 
 # https://github.com/Marisa-Chan/UA_source/blob/44bb2284bf15fd55085ccca160d5bc2f6032e345/src/amesh.cpp#L301
-class Olpl(Chunk):
-    def __init__(self, chunk_id="OLPL"):
-        super(Olpl, self).__init__(chunk_id)
-        self.points = []
-
-    def _int_to_float(self, inp):
-        if isinstance(inp, int):
-            return float(inp) / float(255)
-        if isinstance(inp, list):
-            return [self._int_to_float(x) for x in inp]
-        raise ValueError("int_to_float(): Invalid data type")
+class Olpl(SchemaChunk):
+    """
+    UVs are kept as uv, an (N, 2) uint8 array of all u, v pairs, and offsets, a uint32 array with polygon i being
+    uv[offsets[i]:offsets[i + 1]].
+    points is the same data as a list of polygons of [u, v] lists, built on first access.
+    Like Poo2.points that list is what gets encoded until uv or offsets are used again.
+    """
+    __slots__ = ("_offsets", "_uv", "_points")
+    schema = ChunkSchema("OLPL", [Counted("polygons", numpy.uint8, (2, ))])
 
-    def as_floats(self):
-        return self._int_to_float(self.points)
+    @property
+    def offsets(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        self._points_to_arrays()
+        return self._offsets
 
-    def normalize(self):
-        ret = []
-        for i in self.points:
-            j_ret = []
-            for j in i:
-                k_ret = []
-                for index, k in enumerate(j):
-                    if index % 2:
-                        k = 255 - k
-                    k_ret.append(k / 256)
-                j_ret.append(k_ret)
-            ret.append(j_ret)
-        self.points = ret
-
-    def set_binary_data(self, binary_data):
-        offset = 0
-        olpl_entries = []
+    @property
+    def uv(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        self._points_to_arrays()
+        return self._uv
+
+    @uv.setter
+    def uv(self, uv):
+        self._points_to_arrays()
+        object.__setattr__(self, "_uv", numpy.asarray(uv, numpy.uint8).reshape(-1, 2))
 
-        while offset < len(binary_data):
-            poly_nums = int(struct.unpack(">H", binary_data[offset + 0:offset + 2])[0])
-            offset += 2
+    @property
+    def counts(self):
+        """
+        Number of u, v pairs of every polygon, how version 2 JSON stores the polygons together with uv
 
-            poly = []
-            for i in range(poly_nums):
-                x, y = struct.unpack(">BB", binary_data[offset + 0:offset + 2])
-                offset += 2
-                poly.append([x, y])
+        :rtype: numpy.ndarray
+        """
+        return numpy.diff(self.offsets)
 
-            olpl_entries.append(poly)
+    @counts.setter
+    def counts(self, counts):
+        self._points_to_arrays()
+        object.__setattr__(self, "_offsets", counted_offsets(counts))
 
-        self.points = olpl_entries
-        assert binary_data == self.get_data()
+    @property
+    def polygons(self):
+        """
+        (offsets, uv)
 
-    def get_data(self):
-        ret = bytes()
-        for olpl_entry in self.points:
-            ret += struct.pack(">H", len(olpl_entry))
-            for coordinates in olpl_entry:
-                ret += struct.pack(">BB", *coordinates)
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        return self.offsets, self.uv
+
+    @polygons.setter
+    def polygons(self, polygons):
+        self.set_uv(*polygons)
+
+    def set_uv(self, offsets, uv):
+        offsets = numpy.asarray(offsets, numpy.uint32)
+        uv = numpy.asarray(uv, numpy.uint8).reshape(-1, 2)
+        if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(uv):
+            raise ValueError("Olpl offsets must start at 0 and end at len(uv)")
+        object.__setattr__(self, "_offsets", offsets)
+        object.__setattr__(self, "_uv", uv)
+        object.__setattr__(self, "_points", None)
+        self.mark_dirty()
+
+    def _points_to_arrays(self):
+        points = self._points
+        if points is None:
+            return
+        offsets = counted_offsets([len(polygon) for polygon in points])
+        uv = numpy.array([coordinate for polygon in points for coordinate in polygon], numpy.uint8).reshape(-1, 2)
+        object.__setattr__(self, "_offsets", offsets)
+        object.__setattr__(self, "_uv", uv)
+        object.__setattr__(self, "_points", None)
+
+    @property
+    def points(self):
+        """
+        :rtype: list[list[list[int]]]
+        """
+        if self._points is None:
+            object.__setattr__(self, "_points", self._split(self._uv.tolist()))
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        object.__setattr__(self, "_points", list(points))
+
+    def _split(self, values):
+        offsets = self.offsets.tolist()
+        return [values[start:stop] for start, stop in zip(offsets, offsets[1:])]
 
-        return ret
+    def as_floats(self):
+        return self._split((self.uv / 255).tolist())
+
+    def normalize(self):
+        """
+        Replaces points by normalized_points(). The floats can't be encoded into the chunk again, use
+        normalized_points() or normalized_uv() to leave it intact.
+        """
+        self.points = self.normalized_points()
+
+    def normalized_uv(self):
+        """
+        UV coordinates as floats in [0, 1) with v flipped, the stored points are left alone
+
+        :return: float32 array shaped like uv, split it with offsets
+        :rtype: numpy.ndarray
+        """
+        uv = self.uv.astype(numpy.float32)
+        uv[:, 1] = 255 - uv[:, 1]
+        uv /= 256
+        return uv
+
+    def normalized_points(self):
+        """
+        normalized_uv() as a list of polygons of [u, v] lists
+        """
+        return self._split(self.normalized_uv().tolist())
 
-    def to_dict(self):
-        return {self.chunk_id: {"points": self.points,
+    def to_dict(self, version=1):
+        if version == 2:
+            return {self.chunk_id: {"counts": self.counts.tolist(),
+                                    "uv": self.uv.reshape(-1).tolist(),
+                                    }
+                    }
+        if self._points is not None:
+            return {self.chunk_id: {"points": self._points,
+                                    }
+                    }
+        return {self.chunk_id: {"points": self._split(self._uv.tolist()),
                                 }
                 }
 
 
-class Otl2(Chunk):
-    def __init__(self, chunk_id="OTL2"):
-        super(Otl2, self).__init__(chunk_id)
-        self.points = []
-
-    def set_binary_data(self, binary_data):
-        offset = 0
-        otl2_count = int(len(binary_data) / 2)
+class Otl2(SchemaChunk):
+    """
+    UVs are kept as uv, an (N, 2) uint8 array, points is the same data as a list of [u, v] lists.
+    """
+    __slots__ = ("_uv", "_points")
+    schema = ChunkSchema("OTL2", [Array("uv", numpy.uint8, (2, ))])
 
-        poly = []
-        for i in range(otl2_count):
-            x, y = struct.unpack(">BB", binary_data[offset + 0:offset + 2])
-            offset += 2
-            poly.append([x, y])
+    @property
+    def uv(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        if self._points is not None:
+            object.__setattr__(self, "_uv", numpy.array(self._points, numpy.uint8).reshape(-1, 2))
+            object.__setattr__(self, "_points", None)
+        return self._uv
 
-        self.points = poly
-        assert binary_data == self.get_data()
+    @uv.setter
+    def uv(self, uv):
+        object.__setattr__(self, "_uv", numpy.asarray(uv, numpy.uint8).reshape(-1, 2))
+        object.__setattr__(self, "_points", None)
 
-    def get_data(self):
-        ret = bytes()
-        for point in self.points:
-            ret += struct.pack(">BB", *point)
+    @property
+    def points(self):
+        """
+        :rtype: list[list[int]]
+        """
+        if self._points is None:
+            object.__setattr__(self, "_points", self._uv.tolist())
+        return self._points
 
-        return ret
+    @points.setter
+    def points(self, points):
+        object.__setattr__(self, "_points", list(points))
 
-    def to_dict(self):
-        return {self.chunk_id: {"points": self.points,
+    def to_dict(self, version=1):
+        if version == 2:
+            return {self.chunk_id: {"uv": self.uv.reshape(-1).tolist(),
+                                    }
+                    }
+        return {self.chunk_id: {"points": self._points if self._points is not None else self._uv.tolist(),
                                 }
                 }
 
 
 class Vbmp(Form):
+    __slots__ = ("file_name", )
+
     def __init__(self, chunk_id="VBMP", sub_chunks=None):
         super(Vbmp, self).__init__(chunk_id, sub_chunks)
         self.file_name = "not_used.vbmp"  # TODO USE THIS
@@ -1130,6 +2835,8 @@ class Vbmp(Form):
 
 
 class Embd(Form):
+    __slots__ = ("emrs_resources", )
+
     def __init__(self, form_type="EMBD", sub_chunks=None):
         if sub_chunks is None:
             sub_chunks = list()
@@ -1147,7 +2854,7 @@ class Embd(Form):
                     raise ValueError("Embd().parse_emrs() expects first sub_chunk to be Form() with type ROOT")
             elif i % 2:
                 # noinspection PyUnresolvedReferences
-                emrs_name = sub_chunk.to_class().emrs_name
+                emrs_name = sub_chunk.view().emrs_name
             else:
                 self.emrs_resources[emrs_name] = sub_chunk
 
@@ -1196,7 +2903,7 @@ class Embd(Form):
             elif i % 2:
                 # EMRS
                 # noinspection PyUnresolvedReferences
-                asset_name = sub_chunk.to_class().emrs_name
+                asset_name = sub_chunk.view().emrs_name
             else:
                 # Asset
                 if sub_chunk.form_type == "VBMP":
@@ -1213,6 +2920,8 @@ class Embd(Form):
 
 
 class Mc2(Form):
+    __slots__ = ("embd", "vehicles", "buildings", "ground")
+
     def __init__(self, form_type="MC2 "):
         super(Mc2, self).__init__(form_type)
         self.embd = Embd()
@@ -1326,6 +3035,13 @@ class Mc2(Form):
         self.embd.add_vanm(resource_name, vanm_form)
 
 
+strc_version_struct = struct.Struct(">h")
+strc_base_struct = struct.Struct(">hfffffffffhhhhhhhhll")
+strc_ade_struct = struct.Struct(">hbbhhh")
+strc_area_struct = struct.Struct(">hHHBBBB")
+strc_bani_struct = struct.Struct(">hhh")  # Followed by the zero terminated anim_name
+
+
 class Strc(Chunk):
     STRC_ADE = "STRC_ADE "
     STRC_AREA = "STRC_AREA"
@@ -1333,85 +3049,61 @@ class Strc(Chunk):
     STRC_BASE = "STRC_BASE"
     STRC_UNKNOWN = "STRC_UNKNOWN"
 
+    __slots__ = ("strc_type", "version",
+                 # BASE STRC
+                 "pos", "vec", "scale", "ax", "ay", "az", "rx", "ry", "rz", "att_flags", "_un1", "vis_limit",
+                 "ambient_light",
+                 # ADE STRC
+                 "_nul", "flags", "point", "poly", "_nu2",
+                 # AREA STRC
+                 "polFlags", "clrVal", "trcVal", "shdVal",
+                 # BANI STRC
+                 "offset", "anim_type", "anim_name")
+
     def __init__(self, chunk_id="STRC"):
         super(Strc, self).__init__(chunk_id)
-        # BASE STRC
-        self.strc_type = Strc.STRC_BASE
-        self.version = 0
-        self.pos = [0.0, 0.0, 0.0]
-        self.vec = [0.0, 0.0, 0.0]
-        self.scale = [0.0, 0.0, 0.0]
-        self.ax = 0
-        self.ay = 0
-        self.az = 0
-        self.rx = 0
-        self.ry = 0
-        self.rz = 0
-        self.att_flags = 0
-        self._un1 = 0
-        self.vis_limit = 0
-        self.ambient_light = 0
-        # ADE STRC
-        self.strc_type = Strc.STRC_ADE
-        self.version = 0
-        self._nul = 0
-        self.flags = 0
-        self.point = 0
-        self.poly = 0
-        self._nu2 = 0
-        # AREA STRC
-        self.strc_type = Strc.STRC_AREA
-        self.version = 0
-        self.flags = 0
-        self.polFlags = 0
-        self._un1 = 0
-        self.clrVal = 0
-        self.trcVal = 0
-        self.shdVal = 0
-        # BANI STRC
-        self.strc_type = Strc.STRC_BANI
-        self.version = 0
-        self.offset = 0
-        self.anim_type = 0
-        self.anim_name = ""
-        # GENERIC STRC
-        self.strc_type = Strc.STRC_UNKNOWN
-
-    def set_binary_data(self, binary_data):
+        # Fresh object with nothing to invalidate yet, so the defaults skip Node.__setattr__
+        for name, value in self._defaults:
+            object.__setattr__(self, name, value)
+        for name in ("pos", "vec", "scale"):
+            object.__setattr__(self, name, [0.0, 0.0, 0.0])
+
+    def set_binary_data(self, binary_data, verifier=None):
+        decoder = self._decoders.get(self.detect_type(binary_data))
+        if decoder is None:
+            raise ValueError("Strc().set_data() received invalid data: %s" % binary_data)  # No Test Coverage
+        decoder(self, binary_data)
+        (verifier or round_trip).verify(self, binary_data)
+
+    def get_data(self):
+        encoder = self._encoders.get(self.strc_type)
+        if encoder is None:
+            raise ValueError("Can't get_data() from strc_type STRC_UNKNOWN!!")  # No Test Coverage
+        return encoder(self)
+
+    @staticmethod
+    def detect_type(binary_data):
+        """
+        Works out the STRC variant from the length, version and, for BANI, the fixed header
+
+        :rtype: str
+        """
         if len(binary_data) == 62:
-            # BASE STRC
-            return self._set_binary_data_base(binary_data)
+            return Strc.STRC_BASE
         if len(binary_data) == 10:
-            version = struct.unpack(">h", binary_data[0:2])[0]
-            if version == 1:
-                # ADE STRC
-                return self._set_binary_data_ade(binary_data)
-            if version == 256:
-                # AREA STRC
-                return self._set_binary_data_area(binary_data)
-            raise ValueError("strc_factory() received invalid data:", binary_data)  # No Test Coverage
+            return Strc._types_by_version.get(strc_version_struct.unpack_from(binary_data)[0], Strc.STRC_UNKNOWN)
         if binary_data[0:5] == b"\x00\x01\x00\x06\x00":
-            # BANI STRC
-            return self._set_binary_data_bani(binary_data)
-
-        raise ValueError("Strc().set_data() received invalid data: %s" % binary_data)  # No Test Coverage
-
-    def get_data(self):
-        if self.strc_type == Strc.STRC_BASE:
-            return self._get_data_base()
-        if self.strc_type == Strc.STRC_ADE:
-            return self._get_data_ade()
-        if self.strc_type == Strc.STRC_AREA:
-            return self._get_data_area()
-        if self.strc_type == Strc.STRC_BANI:
-            return self._get_data_bani()
+            return Strc.STRC_BANI
+        return Strc.STRC_UNKNOWN
 
-        raise ValueError("Can't get_data() from strc_type STRC_UNKNOWN!!")  # No Test Coverage
+    def _set_fields(self, strc_type, names, values):
+        # One mark_dirty for the whole decode instead of one per field
+        self.mark_dirty()
+        for name, value in zip(names, values):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "strc_type", strc_type)
 
     def _set_binary_data_base(self, binary_data):
-        if len(binary_data) != 62:
-            # No Test Coverage
-            raise ValueError("Length of binary_data was not 62 bytes! Not valid for STRC_BASE objects!")
         # int16_t version;
         # xyz pos;
         # xyz vec;
@@ -1426,70 +3118,34 @@ class Strc(Chunk):
         # int16_t _un1;
         # int32_t visLimit;
         # int32_t ambientLight;
-        unpacked_data = struct.unpack(">hfffffffffhhhhhhhhll", binary_data)
-        self.version = unpacked_data[0]
-        self.pos = [unpacked_data[1], unpacked_data[2], unpacked_data[3]]
-        self.vec = [unpacked_data[4], unpacked_data[5], unpacked_data[6]]
-        self.scale = [unpacked_data[7], unpacked_data[8], unpacked_data[9]]
-        self.ax = unpacked_data[10]
-        self.ay = unpacked_data[11]
-        self.az = unpacked_data[12]
-        self.rx = unpacked_data[13]
-        self.ry = unpacked_data[14]
-        self.rz = unpacked_data[15]
-        self.att_flags = unpacked_data[16]
-        self._un1 = unpacked_data[17]
-        self.vis_limit = unpacked_data[18]
-        self.ambient_light = unpacked_data[19]
-        self.strc_type = "STRC_BASE"
-        assert binary_data == self.get_data()
+        unpacked_data = strc_base_struct.unpack(binary_data)
+        self._set_fields(Strc.STRC_BASE, self._base_fields,
+                         (unpacked_data[0], list(unpacked_data[1:4]), list(unpacked_data[4:7]),
+                          list(unpacked_data[7:10])) + unpacked_data[10:])
 
     def _get_data_base(self):
-        return struct.pack(">hfffffffffhhhhhhhhll",
-                           self.version,
-                           *self.pos, *self.vec, *self.scale,
-                           self.ax, self.ay, self.az,
-                           self.rx, self.ry, self.rz,
-                           self.att_flags, self._un1,
-                           self.vis_limit, self.ambient_light)
+        return strc_base_struct.pack(self.version,
+                                     *self.pos, *self.vec, *self.scale,
+                                     self.ax, self.ay, self.az,
+                                     self.rx, self.ry, self.rz,
+                                     self.att_flags, self._un1,
+                                     self.vis_limit, self.ambient_light)
 
     def _set_binary_data_ade(self, binary_data):
-        version = struct.unpack(">h", binary_data[0:2])[0]
-        if len(binary_data) != 10:
-            # No Test Coverage
-            raise ValueError("Length of binary_data was not 10 bytes! Not valid for STRC_ADE objects!")
-        if version != 1:
-            raise ValueError("Version of binary_data was not 1! Not valid for STRC_ADE objects!")  # No Test Coverage
         # int16_t version;
         # int8_t _nu1; // Not used
         # int8_t flags;
         # int16_t point;
         # int16_t poly;
         # int16_t _nu2; // Not used
-        unpacked_data = struct.unpack(">hbbhhh", binary_data)
-        self.version = unpacked_data[0]
-        self._nul = unpacked_data[1]
-        self.flags = unpacked_data[2]
-        self.point = unpacked_data[3]
-        self.poly = unpacked_data[4]
-        self._nu2 = unpacked_data[5]
-        self.strc_type = "STRC_ADE "
-        assert binary_data == self.get_data()
+        self._set_fields(Strc.STRC_ADE, self._ade_fields, strc_ade_struct.unpack(binary_data))
 
     def _get_data_ade(self):
-        return struct.pack(">hbbhhh",
-                           self.version,
-                           self._nul, self.flags,
-                           self.point, self.poly, self._nu2)
+        return strc_ade_struct.pack(self.version,
+                                    self._nul, self.flags,
+                                    self.point, self.poly, self._nu2)
 
     def _set_binary_data_area(self, binary_data):
-        version = struct.unpack(">h", binary_data[0:2])[0]
-        if len(binary_data) != 10:
-            # No Test Coverage
-            raise ValueError("Length of binary_data was not 10 bytes! Not valid for STRC_AREA objects!")
-        if version != 256:
-            # No Test Coverage
-            raise ValueError("Version of binary_data was not 256! Not valid for STRC_AREA objects!")
         # int16_t version;
         # uint16_t flags;
         # uint16_t polFlags;
@@ -1497,46 +3153,59 @@ class Strc(Chunk):
         # uint8_t clrVal;
         # uint8_t trcVal;
         # uint8_t shdVal;
-        unpacked_data = struct.unpack(">hHHBBBB", binary_data)
-        self.version = unpacked_data[0]
-        self.flags = unpacked_data[1]
-        self.polFlags = unpacked_data[2]
-        self._un1 = unpacked_data[3]
-        self.clrVal = unpacked_data[4]
-        self.trcVal = unpacked_data[5]
-        self.shdVal = unpacked_data[6]
-        self.strc_type = "STRC_AREA"
-        assert binary_data == self.get_data()
+        self._set_fields(Strc.STRC_AREA, self._area_fields, strc_area_struct.unpack(binary_data))
 
     def _get_data_area(self):
-        return struct.pack(">hHHBBBB",
-                           self.version,
-                           self.flags, self.polFlags,
-                           self._un1, self.clrVal,
-                           self.trcVal, self.shdVal)
+        return strc_area_struct.pack(self.version,
+                                     self.flags, self.polFlags,
+                                     self._un1, self.clrVal,
+                                     self.trcVal, self.shdVal)
 
     def _set_binary_data_bani(self, binary_data):
-        version, offset, anim_type = struct.unpack(">hhh", binary_data[0:6])
-        self.version = version
-        self.offset = offset
-        self.anim_type = anim_type
-        self.anim_name = bytes(binary_data[6:-1]).decode()
-        self.strc_type = "STRC_BANI"
-        assert binary_data == self.get_data()
+        self._set_fields(Strc.STRC_BANI, self._bani_fields,
+                         strc_bani_struct.unpack_from(binary_data) + (bytes(binary_data[6:-1]).decode(),))
 
     def _get_data_bani(self):
-        return struct.pack(">hhh",
-                           self.version,
-                           self.offset,
-                           self.anim_type) + bytes(self.anim_name, "ascii") + b"\x00"
-
-    def to_dict(self):
+        return strc_bani_struct.pack(self.version,
+                                     self.offset,
+                                     self.anim_type) + bytes(self.anim_name, "ascii") + b"\x00"
+
+    _defaults = (("strc_type", STRC_UNKNOWN), ("version", 0),
+                 # BASE STRC
+                 ("ax", 0), ("ay", 0), ("az", 0), ("rx", 0), ("ry", 0), ("rz", 0), ("att_flags", 0), ("_un1", 0),
+                 ("vis_limit", 0), ("ambient_light", 0),
+                 # ADE STRC
+                 ("_nul", 0), ("flags", 0), ("point", 0), ("poly", 0), ("_nu2", 0),
+                 # AREA STRC
+                 ("polFlags", 0), ("clrVal", 0), ("trcVal", 0), ("shdVal", 0),
+                 # BANI STRC
+                 ("offset", 0), ("anim_type", 0), ("anim_name", ""))
+    _base_fields = ("version", "pos", "vec", "scale", "ax", "ay", "az", "rx", "ry", "rz", "att_flags", "_un1",
+                    "vis_limit", "ambient_light")
+    _ade_fields = ("version", "_nul", "flags", "point", "poly", "_nu2")
+    _area_fields = ("version", "flags", "polFlags", "_un1", "clrVal", "trcVal", "shdVal")
+    _bani_fields = ("version", "offset", "anim_type", "anim_name")
+    _types_by_version = {1: STRC_ADE, 256: STRC_AREA}
+    _decoders = {STRC_BASE: _set_binary_data_base,
+                 STRC_ADE: _set_binary_data_ade,
+                 STRC_AREA: _set_binary_data_area,
+                 STRC_BANI: _set_binary_data_bani}
+    _encoders = {STRC_BASE: _get_data_base,
+                 STRC_ADE: _get_data_ade,
+                 STRC_AREA: _get_data_area,
+                 STRC_BANI: _get_data_bani}
+
+    def to_dict(self, version=1):
         if self.strc_type == Strc.STRC_BASE:
+            pos, vec, scale = self.pos, self.vec, self.scale
+            # Small whole numbers, the usual case, print short already
+            if any(value % 1 or abs(value) >= float32_whole_limit for value in (*pos, *vec, *scale)):
+                pos, vec, scale = float32_tolist((pos, vec, scale))
             return {self.chunk_id: {"strc_type": self.strc_type,
                                     "version": self.version,
-                                    "pos": self.pos,
-                                    "vec": self.vec,
-                                    "scale": self.scale,
+                                    "pos": pos,
+                                    "vec": vec,
+                                    "scale": scale,
                                     "ax": self.ax,
                                     "ay": self.ay,
                                     "az": self.az,
@@ -1582,27 +3251,84 @@ class Strc(Chunk):
         raise ValueError("STRC().to_dict() Can't get json for unknown STRC!")  # No Test Coverage
 
 
+strc_dtypes = {
+    Strc.STRC_BASE: numpy.dtype([("version", ">i2"), ("pos", ">f4", 3), ("vec", ">f4", 3), ("scale", ">f4", 3),
+                                 ("ax", ">i2"), ("ay", ">i2"), ("az", ">i2"), ("rx", ">i2"), ("ry", ">i2"),
+                                 ("rz", ">i2"), ("att_flags", ">i2"), ("_un1", ">i2"), ("vis_limit", ">i4"),
+                                 ("ambient_light", ">i4")]),
+    Strc.STRC_ADE: numpy.dtype([("version", ">i2"), ("_nul", "i1"), ("flags", "i1"), ("point", ">i2"),
+                                ("poly", ">i2"), ("_nu2", ">i2")]),
+    Strc.STRC_AREA: numpy.dtype([("version", ">i2"), ("flags", ">u2"), ("polFlags", ">u2"), ("_un1", "u1"),
+                                 ("clrVal", "u1"), ("trcVal", "u1"), ("shdVal", "u1")]),
+    Strc.STRC_BANI: numpy.dtype([("version", ">i2"), ("offset", ">i2"), ("anim_type", ">i2")]),
+}
+
+
+def strc_columns(form):
+    """
+    Decodes every STRC below form in one go, grouped by variant.
+    Each variant maps to a dict of columns named like the Strc attributes, numpy arrays with one row per STRC
+    (pos, vec and scale have shape (N, 3)). BANI additionally has anim_name as a list.
+    The "chunks" entry lists the STRC chunks in row order.
+
+    :rtype: dict[str, dict]
+    """
+    grouped = {}
+    for chunk in form.get_all("STRC", max_count=sys.maxsize):
+        binary_data = chunk.get_data()
+        strc_type = Strc.detect_type(binary_data)
+        if strc_type == Strc.STRC_UNKNOWN:
+            raise ValueError("strc_columns() found a STRC of unknown type: %s" % bytes(binary_data))
+        grouped.setdefault(strc_type, ([], []))
+        grouped[strc_type][0].append(chunk)
+        grouped[strc_type][1].append(binary_data)
+
+    ret = {}
+    for strc_type, (chunks, datas) in grouped.items():
+        dtype = strc_dtypes[strc_type]
+        if strc_type == Strc.STRC_BANI:
+            rows = numpy.frombuffer(b"".join(bytes(data[:dtype.itemsize]) for data in datas), dtype)
+        else:
+            rows = numpy.frombuffer(b"".join(datas), dtype)
+        columns = {name: rows[name] for name in dtype.names}
+        if strc_type == Strc.STRC_BANI:
+            columns["anim_name"] = [bytes(data[6:-1]).decode() for data in datas]
+        columns["chunks"] = chunks
+        ret[strc_type] = columns
+    return ret
+
+
 class Root(Form):
+    __slots__ = ()
+
     def __init__(self, form_type="ROOT", sub_chunks=None):
         super(Root, self).__init__(form_type, sub_chunks)
 
 
 class Kids(Form):
+    __slots__ = ()
+
     def __init__(self, form_type="KIDS", sub_chunks=None):
         super(Kids, self).__init__(form_type, sub_chunks)
 
 
 class Objt(Form):
+    __slots__ = ()
+
     def __init__(self, form_type="OBJT", sub_chunks=None):
         super(Objt, self).__init__(form_type, sub_chunks)
 
 
 class Base(Form):
+    __slots__ = ()
+
     def __init__(self, form_type="BASE", sub_chunks=None):
         super(Base, self).__init__(form_type, sub_chunks)
 
 
 class Sklt(Form):
+    __slots__ = ()
+
     def __init__(self, form_type="SKLT", sub_chunks=None):
         super(Sklt, self).__init__(form_type, sub_chunks)
 
@@ -1627,19 +3353,10 @@ master_list = {
     "VBMP": Vbmp,
     "ATTS": Atts,
     "BODY": Body,
-    "CLID": Clid,
     "DATA": Data,
-    "EMRS": Emrs,
-    "HEAD": Head,
-    "NAM2": Nam2,
-    "NAME": Name,
-    "OLPL": Olpl,
-    "OTL2": Otl2,
-    "POL2": Pol2,
-    "POO2": Poo2,
-    "SEN2": Sen2,
     "STRC": Strc,
 }
+master_list.update((cls.schema.chunk_id, cls) for cls in schema_chunk_classes)
 
 
 def parse_set_descriptor(set_number="1"):
@@ -1740,6 +3457,125 @@ def compile_set_bas(set_number="1"):
 
     path = os.path.join("output", "set{}_compiled.bas")
     mc2.save_to_file(path.format(set_number))
+    write_set_toc(path.format(set_number))
+
+
+emrs_kinds = {"sklt.class": "skeleton", "ilbm.class": "image", "bmpanim.class": "animation"}
+set_object_kinds = ("vehicle", "building", "ground")  # Order of the OBJTs in MC2 /OBJT/BASE/KIDS
+
+
+def scan_set_toc(file_name):
+    """
+    Lists every EMRS resource, vehicle, building and ground object of a compiled set without parsing it.
+    offset and length cover the whole Form, so data[offset:offset + length] can be parsed on its own.
+
+    :rtype: list[dict]
+    """
+    kids_path = ("MC2 ", "OBJT", "BASE", "KIDS")
+    objects_path = kids_path + ("OBJT", "BASE", "KIDS")
+    name_path = objects_path + ("OBJT", "BASE", "ROOT")
+
+    entries = []
+    emrs = None
+    object_kind = -1
+    with open(file_name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for depth, path, ckid, is_form, offset, size in iter_chunks(buffer):
+            if ckid == "EMRS" and path[-1:] == ("EMBD",):
+                class_id, name = buffer[offset + 8:offset + 8 + size].split(b"\x00")[:2]
+                emrs = (emrs_kinds.get(class_id.decode(), class_id.decode()), name.decode())
+            elif emrs is not None and is_form and path[-1:] == ("EMBD",):
+                entries.append({"name": emrs[1], "kind": emrs[0], "offset": offset, "length": 8 + size})
+                emrs = None
+            elif is_form and ckid == "OBJT" and path == kids_path:
+                object_kind += 1
+            elif is_form and ckid == "OBJT" and path == objects_path:
+                entries.append({"name": None, "kind": set_object_kinds[object_kind], "offset": offset,
+                                "length": 8 + size})
+            elif ckid == "NAME" and path == name_path and entries[-1]["name"] is None:
+                entries[-1]["name"] = buffer[offset + 8:offset + 8 + size].split(b"\x00")[0].decode()
+    return entries
+
+
+def write_set_toc(file_name):
+    """
+    Writes the table of contents of a compiled set next to it as file_name + ".toc"
+    """
+    stat = os.stat(file_name)  # Before scanning, a change while we scan makes the sidecar out of date
+    toc = {"file_size": stat.st_size,
+           "mtime_ns": stat.st_mtime_ns,
+           "entries": [[e["kind"], e["name"], e["offset"], e["length"]] for e in scan_set_toc(file_name)],
+           }
+    with open(file_name + ".toc", "w") as f:
+        f.write(json.dumps(toc, indent=2, sort_keys=True))
+
+
+def read_set_toc(file_name):
+    """
+    Reads the .toc sidecar of a compiled set, or scans the set when the sidecar is missing or out of date.
+    The sidecar is only used when size and modification time of the set are the ones it was written for.
+
+    :rtype: list[dict]
+    """
+    toc_name = file_name + ".toc"
+    if os.path.isfile(toc_name):
+        with open(toc_name, "r") as f:
+            toc = json.loads(f.read())
+        stat = os.stat(file_name)
+        if toc["file_size"] == stat.st_size and toc.get("mtime_ns") == stat.st_mtime_ns:
+            return [{"kind": kind, "name": name, "offset": offset, "length": length}
+                    for kind, name, offset, length in toc["entries"]]
+        logging.info("%s does not match %s, scanning it again", toc_name, file_name)
+    return scan_set_toc(file_name)
+
+
+class CompiledSet(object):
+    """
+    Reads single resources and objects out of a compiled set by seeking to them instead of parsing the whole file
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.entries = read_set_toc(file_name)
+        self._entries = {}
+        for entry in self.entries:
+            self._entries.setdefault((entry["kind"], entry["name"]), entry)  # First one wins, like get_single
+
+    def names(self, kind):
+        return [entry["name"] for entry in self.entries if entry["kind"] == kind]
+
+    def get(self, kind, name):
+        """
+        :rtype: Form
+        """
+        entry = self._entries.get((kind, name))
+        if entry is None:
+            return None
+        with open(self.file_name, "rb") as f:
+            f.seek(entry["offset"])
+            return Form().parse_buffer(f.read(entry["length"]))[0]
+
+    def get_vehicle(self, name):
+        return self.get("vehicle", name)
+
+    def get_building(self, name):
+        return self.get("building", name)
+
+    def get_ground(self, name):
+        return self.get("ground", name)
+
+    def get_resource(self, name):
+        for kind in emrs_kinds.values():
+            form = self.get(kind, name)
+            if form is not None:
+                return form
+        return None
+
+
+def open_set(file_name):
+    """
+    :rtype: CompiledSet
+    """
+    return CompiledSet(file_name)
 
 
 def compile_bee_box(set_number="1"):
@@ -7,28 +7,22 @@ def main():
     files = glob.glob("set*/**/*.bas", recursive=True)
     for file in files:
         print("file:", file)
-        with open(file, "rb") as f:
-            form = compile.Form().load_from_file(file)
-            with open(file + ".json", "w") as o:
-                o.write(form.to_json())
+        form = compile.Form().load_from_file(file)
+        form.save_to_json_file(file + ".json")
 
     #
     files = glob.glob("set*/**/*.skl", recursive=True)
     for file in files:
         print("file:", file)
-        with open(file, "rb") as f:
-            form = compile.Form().load_from_file(file)
-            with open(file + ".json", "w") as o:
-                o.write(form.to_json())
+        form = compile.Form().load_from_file(file)
+        form.save_to_json_file(file + ".json")
 
     #
     files = glob.glob("set*/**/*.ANM", recursive=True)
     for file in files:
         print("file:", file)
-        with open(file, "rb") as f:
-            form = compile.Form().load_from_file(file)
-            with open(file + ".json", "w") as o:
-                o.write(form.to_json())
+        form = compile.Form().load_from_file(file)
+        form.save_to_json_file(file + ".json")
 
     #
     files = glob.glob("set*/*.ILB", recursive=True)
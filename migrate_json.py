@@ -0,0 +1,69 @@
+import compile
+import glob
+import logging
+import os
+import sys
+
+
+def convert(old_json, version):
+    """
+    Returns the JSON source old_json in the given layout, one of compile.json_versions, indented like old_json
+
+    :raises ValueError: if the result does not compile to the same bytes as old_json
+    :rtype: str
+    """
+    binary_data = compile.Form().from_json(compile.json.loads(old_json)).full_data()
+
+    # Keep the indentation of the file, most sources in assets use one space unlike to_json()
+    lines = old_json.split("\n", 2)
+    indent = len(lines[1]) - len(lines[1].lstrip(" ")) if len(lines) > 1 else 2
+
+    form = compile.Form().parse_buffer(binary_data)[0]
+    new_json = compile.json.dumps(form.to_dict(compile.check_json_version(version)), indent=indent or 2, sort_keys=True)
+    if new_json != old_json and compile.Form().from_json(new_json).full_data() != binary_data:
+        raise ValueError("it does not compile to the same bytes in version %i" % version)
+    return new_json
+
+
+def migrate_file(file_name, version):
+    """
+    Rewrites one JSON source in the given layout. The file is only replaced when the new JSON compiles to exactly
+    the same bytes as the old one.
+
+    :return: True if the file was rewritten
+    :rtype: bool
+    """
+    with open(file_name, "r") as f:
+        old_json = f.read()
+    new_json = convert(old_json, version)
+    if new_json == old_json:
+        return False
+
+    with open(file_name + ".tmp", "w") as f:
+        f.write(new_json)
+    os.replace(file_name + ".tmp", file_name)
+    return True
+
+
+def main(version, directories):
+    changed = 0
+    for directory in directories:
+        files = glob.glob(os.path.join(directory, "**", "*.json"), recursive=True)
+        files.sort()
+        for file_name in files:
+            try:
+                if migrate_file(file_name, version):
+                    changed += 1
+            except (ValueError, KeyError) as e:
+                logging.error("Skipping %s: %s", file_name, e)
+    logging.info("Migrated %i files to version %i", changed, version)
+
+
+if __name__ == "__main__":
+    # migrate_json.py [version] [directory ...], by default everything below assets to version 2
+    if len(sys.argv) > 1:
+        json_version = int(sys.argv[1])
+    else:
+        json_version = 2
+
+    main(json_version, sys.argv[2:] or ["assets"])
@@ -186,6 +186,43 @@ def my_encode(markers, _default, _encoder, _indent, _floatstr,
     return _iterencode
 
 
+class LazyList(list):
+    """
+    Encodes like a list of convert(item) for every item, but each value is only made when the encoder gets to it
+    and dropped once it is written, so dump() never holds more than one of them at a time.
+    The C encoder that json.dumps() uses without indent copies it into a plain list through __iter__ first,
+    the output is the same but every value is made up front.
+    """
+
+    def __init__(self, items, convert):
+        super().__init__()
+        self.items = items
+        self.convert = convert
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return map(self.convert, self.items)
+
+
+def dump(obj, fp, buffer_size=65536, **kwargs):
+    """
+    Like json.dump(), but hands fp the small fragments of the encoder in batches of about buffer_size characters
+    instead of one write per fragment. JSONEncoder.iterencode never uses the C encoder, so LazyList stays lazy.
+    """
+    pending = []
+    pending_size = 0
+    for fragment in json.JSONEncoder(**kwargs).iterencode(obj):
+        pending.append(fragment)
+        pending_size += len(fragment)
+        if pending_size >= buffer_size:
+            fp.write("".join(pending))
+            pending.clear()
+            pending_size = 0
+    fp.write("".join(pending))
+
+
 # Apply monkey patch
 json.encoder._make_iterencode = my_encode
 loads = json.loads
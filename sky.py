@@ -11,8 +11,7 @@ def decompile_sky():
         form.get_single("EMBD").to_class().extract_resources(sky_dir)  # Extract images + skeletons
         form.get_single("EMBD").sub_chunks = [compile.Form("ROOT")]  # Drop resources since we already extracted them
 
-        with open(os.path.join(sky_dir, "sky.json"), "w") as f:
-            f.write(form.to_json())
+        form.save_to_json_file(os.path.join(sky_dir, "sky.json"))
 
 
 def compile_sky():
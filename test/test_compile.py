@@ -1,5 +1,6 @@
 import compile
 import os
+import struct
 import unittest
 
 
@@ -59,6 +60,20 @@ class TestChunk(unittest.TestCase):
         c.set_binary_data(data_bytes)
         self.assertEqual(c.size(), len(data_bytes))
 
+    def test_size_typed(self):
+        c = compile.Name()
+        c.name = "TEST"
+        c.zero_terminated = True
+        self.assertEqual(c.size(), 5)
+
+    def test_write_to(self):
+        import io
+        c = compile.Chunk("TEST")
+        c.set_binary_data(b"This is bytes")
+        f = io.BytesIO()
+        self.assertEqual(c.write_to(f), 22)
+        self.assertEqual(f.getvalue(), c.full_data())
+
     def test_load_data_from_file_1(self):
         c = compile.Chunk()
         with self.assertRaises(FileNotFoundError) as context:
@@ -203,6 +218,19 @@ class TestForm(unittest.TestCase):
         f = compile.Form("TFRM", [c])
         self.assertEqual(f.full_data(), b"FORM\x00\x00\x00\x1cTFRMCHNK\x00\x00\x00\x0fTEST CHUNK DATA\x00")
 
+    def test_write_to(self):
+        import io
+        c = compile.Chunk("CHNK")
+        c.data = b"TEST CHUNK DATA"
+        n = compile.Name()
+        n.name = "NESTED"
+        f = compile.Form("TFRM", [c, compile.Form("NEST", [n])])
+        out = io.BytesIO()
+        self.assertEqual(f.write_to(out), 62)
+        self.assertEqual(out.getvalue(), b"FORM\x00\x00\x00\x36TFRMCHNK\x00\x00\x00\x0fTEST CHUNK DATA\x00"
+                                         b"FORM\x00\x00\x00\x12NESTNAME\x00\x00\x00\x06NESTED")
+        self.assertEqual(f.size(), 54)
+
     def test_to_class_1(self):
         c = compile.Chunk()
         c.chunk_id = "NAME"
@@ -212,6 +240,29 @@ class TestForm(unittest.TestCase):
         self.assertTrue(isinstance(cl, compile.Vbmp))
         self.assertTrue(isinstance(cl.child(0).to_class(), compile.Name))
 
+    def test_to_class_2(self):
+        embd = compile.Form("EMBD", [compile.Form("ROOT")])
+        f = compile.Form("TEST", [embd])
+        f.size()
+        typed = embd.to_class()
+        self.assertTrue(isinstance(typed, compile.Embd))
+        self.assertIs(embd.to_class(), typed)
+        typed.size()
+
+        sklt = compile.Form("SKLT", [compile.Chunk("POO2")])
+        typed.add_sklt("complete.skl", sklt)
+        self.assertEqual(len(embd.sub_chunks), 3)
+        self.assertEqual(f.full_data(), b"FORM\x00\x00\x00\x52TEST" + typed.full_data())
+        reparsed = compile.Form().parse_buffer(f.full_data())[0]
+        self.assertEqual(reparsed.get_single("EMRS").to_class().emrs_name, "complete.skl")
+        self.assertEqual(reparsed.get_single("SKLT").full_data(), sklt.full_data())
+
+        # And the other way round
+        embd.sub_chunks.pop()
+        self.assertEqual(typed.full_data(), embd.full_data())
+        typed.sub_chunks = [compile.Form("ROOT")]
+        self.assertEqual(f.full_data(), b"FORM\x00\x00\x00\x1cTESTFORM\x00\x00\x00\x10EMBDFORM\x00\x00\x00\x04ROOT")
+
     # TODO to_class (error condition)
 
     def test_to_json(self):
@@ -229,6 +280,61 @@ class TestForm(unittest.TestCase):
         f = compile.Form("TFRM", [c])
         self.assertEqual(f.size(), len(b'TFRMCHNK\x00\x00\x00\x0fTEST CHUNK DATA\x00'))
 
+    def test_size_cache_1(self):
+        c = compile.Chunk("CHNK")
+        c.data = b"TEST"
+        inner = compile.Form("INNR", [c])
+        f = compile.Form("TFRM", [inner])
+        self.assertEqual(f.size(), 28)
+        c.data = b"LONGER TEST"
+        self.assertEqual(inner.size(), 24)
+        self.assertEqual(f.size(), 36)
+        self.assertEqual(f.full_data()[4:8], b"\x00\x00\x00\x24")
+
+    def test_size_cache_2(self):
+        strc = compile.Strc()
+        strc.strc_type = compile.Strc.STRC_BASE
+        f1 = compile.Form("ONE ", [strc])
+        f2 = compile.Form("TWO ", [compile.Form("ROOT"), strc])
+        self.assertEqual(f1.size(), 74)
+        self.assertEqual(f2.size(), 86)
+        strc.strc_type = compile.Strc.STRC_ADE
+        self.assertEqual(f1.size(), 22)
+        self.assertEqual(f2.size(), 34)
+
+    def test_size_cache_3(self):
+        c1 = compile.Chunk("ABC1")
+        c2 = compile.Chunk("ABC2")
+        c2.data = b"DATA"
+        f = compile.Form("TEST", [c1])
+        self.assertEqual(f.size(), 12)
+        f.sub_chunks.insert(0, c2)
+        self.assertEqual(f.size(), 24)
+        f.sub_chunks.pop(1)
+        self.assertEqual(f.size(), 16)
+        f.sub_chunks[0] = c1
+        self.assertEqual(f.size(), 12)
+        f.sub_chunks = [c1, c2]
+        self.assertEqual(f.size(), 24)
+        self.assertEqual(f.full_data(), b"FORM\x00\x00\x00\x18TESTABC1\x00\x00\x00\x00ABC2\x00\x00\x00\x04DATA")
+
+    def test_mark_dirty(self):
+        poo2 = compile.Poo2()
+        f = compile.Form("TEST", [poo2])
+        self.assertEqual(f.size(), 12)
+        poo2.points.append({"x": 1.0, "y": 2.0, "z": 3.0})  # Changed in place, typed chunks are encoded every time
+        self.assertEqual(f.size(), 24)
+        self.assertEqual(f.full_data()[-12:], struct.pack(">3f", 1.0, 2.0, 3.0))
+
+        # The same for the typed view of a parsed chunk, the Forms above stop reusing the bytes they were parsed from
+        f = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        f.size()
+        view = f.get_single("STRC").view()
+        view.pos[0] = 123.0
+        reparsed = compile.Form().parse_buffer(f.full_data())[0]
+        self.assertEqual(reparsed.get_single("STRC").to_class().pos[0], 123.0)
+        self.assertEqual(f.size(), reparsed.size())
+
     def test_get_all_1(self):
         m = compile.Mc2()
         v = compile.Vbmp()
@@ -268,6 +374,31 @@ class TestForm(unittest.TestCase):
         self.assertEqual(f.get_single("ABCD"), None)
         self.assertEqual(f.get_single("ABC3"), c3)
 
+    def test_build_index(self):
+        f = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "SKLT.bin"))
+        walked = {ckid: f.get_all(ckid) for ckid in ("POO2", "POL2", "NAME", "NONE")}
+        f.build_index()
+        for ckid, chunks in walked.items():
+            self.assertEqual(f.get_all(ckid), chunks)
+        self.assertEqual(f.get_single("POL2"), walked["POL2"][0])
+
+    def test_build_index_updates(self):
+        c1 = compile.Chunk("ABC1")
+        c2 = compile.Chunk("ABC2")
+        inner = compile.Form("INNR", [c1])
+        f = compile.Form("TEST", [inner]).build_index()
+        self.assertEqual(f.get_all("ABC1"), [c1])
+        f.add_chunk(c2)
+        self.assertEqual(f.get_all("ABC2"), [c2])
+        c3 = compile.Chunk("ABC2")
+        inner.add_chunk(c3)
+        self.assertEqual(f.get_all("ABC2"), [c3, c2])
+        c3.chunk_id = "ABC3"
+        self.assertEqual(f.get_all("ABC2"), [c2])
+        self.assertEqual(f.get_single("ABC3"), c3)
+        inner.sub_chunks.pop(0)
+        self.assertEqual(f.get_all("ABC1"), [])
+
     def test_load_from_file_1(self):
         f = compile.Form()
         with self.assertRaises(FileNotFoundError) as context:
@@ -284,6 +415,313 @@ class TestForm(unittest.TestCase):
     # TODO save_to_file (Can use io.BytesIO to provide a fake file stream)
     # TODO parse_stream
 
+    def test_parse_buffer(self):
+        with open(os.path.join("test", "bin", "forms", "SKLT.bin"), "rb") as f:
+            data = f.read()
+        view = memoryview(data)
+        f = compile.Form().parse_buffer(view)[0]
+        self.assertEqual(f.full_data(), data)
+        poo2 = f.get_single("POO2")
+        self.assertTrue(isinstance(poo2.data, memoryview))
+        self.assertTrue(poo2.data.obj is data)
+        self.assertTrue(isinstance(poo2.get_data(), bytes))
+
+    def test_save_to_json_file(self):
+        import glob
+        import tempfile
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "form.json")
+            for form_file in glob.glob("test/bin/forms/*.bin"):
+                form = compile.Form().load_from_file(form_file)
+                for version in (1, 2):
+                    form.save_to_json_file(file_name, version=version)
+                    with open(file_name, "r") as f:
+                        self.assertEqual(f.read(), form.to_json(version=version))
+
+    def test_to_lazy_dict(self):
+        import json
+        from unittest import mock
+        form = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        encoder = json.JSONEncoder(indent=2, sort_keys=True)
+        self.assertEqual("".join(encoder.iterencode(form.to_lazy_dict())), form.to_json())
+        # Without indent json.dumps uses the C encoder
+        self.assertEqual(compile.json.dumps(form.to_lazy_dict()), compile.json.dumps(form.to_dict()))
+
+        with mock.patch.object(compile, "LazyList", None):
+            # Without myjson
+            self.assertEqual(form.to_lazy_dict(), form.to_dict())
+
+    def test_parse_strict(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        with open(data_file, "rb") as f:
+            data = f.read()
+        limits = compile.ParseLimits()
+        strict = compile.Form().parse_buffer(data, limits=limits)[0]
+        self.assertEqual(strict.full_data(), data)
+        self.assertEqual(compile.Form().load_from_file(data_file, limits=limits).full_data(), data)
+
+        # Truncated input
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().parse_buffer(data[:len(data) - 3], limits=limits)
+        self.assertEqual(cm.exception.offset, 0)
+        # Chunk claiming more than its parent has left
+        bad = b"FORM\x00\x00\x00\x10TEST" + b"NAME\x00\x00\x10\x00" + b"abcd"
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().parse_buffer(bad, limits=limits)
+        self.assertEqual(cm.exception.offset, 12)
+        # FORM without room for its form type
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().parse_buffer(b"FORM\x00\x00\x00\x08TEST" + b"FORM\x00\x00\x00\x00", limits=limits)
+        self.assertEqual(cm.exception.offset, 12)
+        # Nesting deeper than allowed
+        nested = b""
+        for _ in range(10):
+            nested = b"FORM" + (len(nested) + 4).to_bytes(4, "big") + b"TEST" + nested
+        compile.Form().parse_buffer(nested, limits=compile.ParseLimits(max_depth=10))
+        with self.assertRaises(compile.ParseError):
+            compile.Form().parse_buffer(nested, limits=compile.ParseLimits(max_depth=9))
+        # Too many chunks and too many bytes
+        with self.assertRaises(compile.ParseError):
+            compile.Form().parse_buffer(data, limits=compile.ParseLimits(max_chunks=10))
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().load_from_file(data_file, limits=compile.ParseLimits(max_bytes=100))
+        self.assertEqual(cm.exception.offset, 100)
+
+    def test_parse_truncated(self):
+        with open(os.path.join("test", "bin", "forms", "OBJT.bin"), "rb") as f:
+            data = f.read()
+        # Cut off in the middle of the header of the first chunk below the outer FORM
+        truncated = data[:16]
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().parse_buffer(truncated)
+        self.assertEqual(cm.exception.offset, 12)
+        with self.assertRaises(compile.ParseError) as cm:
+            compile.Form().parse_buffer(truncated, lazy=True)[0].sub_chunks
+        self.assertEqual(cm.exception.offset, 12)
+        with self.assertRaises(compile.ParseError) as cm:
+            list(compile.iter_chunks(truncated))
+        self.assertEqual(cm.exception.offset, 12)
+
+    def test_iter_chunks(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        expected = []
+
+        def walk(form, path, offset):
+            for c in form.sub_chunks:
+                if isinstance(c, compile.Form):
+                    expected.append((len(path), path, c.form_type, True, offset, c.size()))
+                    walk(c, path + (c.form_type,), offset + 12)
+                else:
+                    expected.append((len(path), path, c.chunk_id, False, offset, c.size()))
+                offset += 8 + c.size() + (c.size() & 1 if isinstance(c, compile.Chunk) else 0)
+
+        f = compile.Form().load_from_file(data_file)
+        expected.append((0, (), f.form_type, True, 0, f.size()))
+        walk(f, (f.form_type,), 12)
+        self.assertEqual(list(compile.iter_chunks(data_file)), expected)
+        with open(data_file, "rb") as bas_file:
+            self.assertEqual(list(compile.iter_chunks(bas_file.read())), expected)
+
+    def test_load_from_file_lazy(self):
+        data_file = os.path.join("test", "bin", "forms", "SKLT.bin")
+        eager = compile.Form().load_from_file(data_file)
+        lazy = compile.Form().load_from_file(data_file, lazy=True)
+        self.assertEqual(lazy.form_type, "SKLT")
+        self.assertEqual(lazy.get_single("POO2").get_data(), eager.get_single("POO2").get_data())
+        self.assertEqual(lazy.full_data(), eager.full_data())
+        lazy.close()
+
+        # A nested Form is only parsed when it is used, so a broken one goes unnoticed until then
+        broken = b"FORM\x00\x00\x00\x08BRKN" + b"NAME"
+        data = b"FORM\x00\x00\x00\x22TEST" + b"NAME\x00\x00\x00\x05DUMMY\x00" + broken
+        lazy = compile.Form().parse_buffer(data, lazy=True)[0]
+        self.assertEqual(lazy.get_single("NAME").get_data(), b"DUMMY")
+        with self.assertRaises(compile.ParseError):
+            lazy.get_single("BRKN").sub_chunks
+
+    def test_close(self):
+        import shutil
+        import tempfile
+        eager = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = shutil.copy(os.path.join("test", "bin", "forms", "OBJT.bin"), directory)
+            with compile.Form().load_from_file(data_file, lazy=True) as lazy:
+                clid = lazy.get_single("CLID")
+            if os.path.exists("/proc/self/maps"):
+                with open("/proc/self/maps") as maps:
+                    self.assertNotIn(os.path.realpath(data_file), maps.read())
+            # Once closed, the tree no longer reads from the file
+            with open(data_file, "r+b") as f:
+                f.write(bytes(os.path.getsize(data_file)))
+            os.remove(data_file)
+        self.assertEqual(clid.get_data(), eager.get_single("CLID").get_data())
+        self.assertEqual(lazy.full_data(), eager.full_data())
+        eager.close()  # Nothing is mapped, nothing to do
+
+    def test_no_reference_cycles(self):
+        import gc
+        import weakref
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        gc.disable()
+        self.addCleanup(gc.enable)
+        f = compile.Form().load_from_file(data_file, lazy=True)
+        f.get_single("NAME").view()
+        f.get_single("BASE").to_class()
+        base = f.get_single("BASE")
+        base.sub_chunks.remove(base.get_single("STRC"))  # Dropped chunks don't keep the file mapped either
+        refs = [weakref.ref(f), weakref.ref(base), weakref.ref(base.get_single("NAME"))]
+        f.close()
+        del f, base
+        self.assertEqual([ref() for ref in refs], [None, None, None])
+
+    def test_write_to_unchanged(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        with open(data_file, "rb") as f:
+            data = f.read()
+        for lazy in (False, True):
+            f = compile.Form().load_from_file(data_file, lazy=lazy)
+            self.assertEqual(f.full_data(), data)
+            f.close()
+
+        # Encoding writes pad bytes as 0, the original bytes keep whatever was there
+        data = b"FORM\x00\x00\x00\x1aTEST" + b"FORM\x00\x00\x00\x0eSUBF" + b"NAME\x00\x00\x00\x01A\xff"
+        for lazy in (False, True):
+            f = compile.Form().parse_buffer(data, lazy=lazy)[0]
+            self.assertEqual(f.full_data(), data)
+            f.get_single("SUBF").get_single("NAME").data = b"B"
+            self.assertEqual(f.full_data(), data[:-2] + b"B\x00")
+
+    def test_write_to_changed(self):
+        def rebuild(form):
+            # The same tree made from scratch, nothing in it remembers the bytes it was parsed from
+            sub_chunks = []
+            for c in form.sub_chunks:
+                if isinstance(c, compile.Form):
+                    sub_chunks.append(rebuild(c))
+                else:
+                    sub_chunks.append(compile.Chunk(c.chunk_id))
+                    sub_chunks[-1].data = bytes(c.get_data())
+            return compile.Form(form.form_type, sub_chunks)
+
+        f = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        f.get_single("SKLC").get_single("NAME").data = b"RENAMED\x00"
+        patched = f.full_data()
+        self.assertEqual(patched, rebuild(f).full_data())
+        self.assertEqual(len(patched), f.size() + 8)
+        reparsed = compile.Form().parse_buffer(patched)[0]
+        self.assertEqual(reparsed.get_single("SKLC").get_single("NAME").get_data(), b"RENAMED\x00")
+
+    def test_content_hash(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        a = compile.Form().load_from_file(data_file)
+        b = compile.Form().load_from_file(data_file, lazy=True)
+        self.assertEqual(a.content_hash(), b.content_hash())
+        b.close()
+        self.assertEqual(a.get_single("STRC").content_hash(), a.get_single("STRC").to_class().content_hash())
+
+        before = a.content_hash()
+        a.get_single("SKLC").get_single("NAME").data = b"RENAMED\x00"
+        self.assertNotEqual(a.content_hash(), before)
+        self.assertEqual(a.content_hash(), compile.Form().parse_buffer(a.full_data())[0].content_hash())
+
+    def test_diff(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        a = compile.Form().load_from_file(data_file)
+        b = compile.Form().load_from_file(data_file)
+        self.assertEqual(compile.diff(a, b), [])
+
+        b.get_single("SKLC").get_single("NAME").data = b"RENAMED\x00"
+        b.get_single("ADES").sub_chunks.pop(0)
+        b.get_single("BASE").add_chunk(compile.Chunk("TEST"))
+        self.assertEqual(compile.diff(a, b), [
+            ("changed", "OBJT/BASE/KIDS/OBJT/BASE/OBJT/SKLC/NAME"),
+            ("removed", "OBJT/BASE/KIDS/OBJT/BASE/ADES/OBJT"),
+            ("added", "OBJT/BASE/TEST"),
+        ])
+
+    def test_intern(self):
+        from unittest import mock
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        patcher = mock.patch.object(compile, "interner", compile.Interner())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        plain = compile.Form().load_from_file(data_file)
+        a = compile.Form().load_from_file(data_file, intern=True)
+        b = compile.Form().load_from_file(data_file, intern=True)
+        self.assertEqual(a.full_data(), plain.full_data())
+        self.assertIs(a.get_single("CLID"), b.get_single("CLID"))
+        self.assertIs(a.get_single("ADES"), b.get_single("ADES"))
+        self.assertGreater(compile.interner.report()["deduplicated"], 0)
+
+        clid = a.get_single("CLID")
+        with self.assertRaises(AttributeError):
+            clid.data = b"other.class\x00"
+        with self.assertRaises(AttributeError):
+            a.get_single("ADES").sub_chunks.append(compile.Chunk("TEST"))
+        self.assertIsNot(clid.to_class(), clid.to_class())
+
+        # The Forms that were not shared stay editable and re-encode correctly
+        a.add_chunk(compile.Chunk("TEST"))
+        self.assertEqual(a.full_data(), compile.Form().parse_buffer(a.full_data())[0].full_data())
+        self.assertEqual(b.full_data(), plain.full_data())
+
+        # The trees own the shared nodes, the interner lets go of them with the last tree
+        del a, b, clid
+        self.assertEqual(compile.interner.report()["shared"], 0)
+        c = compile.Form().load_from_file(data_file, intern=True)
+        compile.interner.clear()
+        self.assertEqual(compile.interner.report(), {"shared": 0, "visited": 0, "deduplicated": 0})
+        d = compile.Form().load_from_file(data_file, intern=True)
+        self.assertIsNot(c.get_single("CLID"), d.get_single("CLID"))
+        self.assertEqual(d.full_data(), plain.full_data())
+
+    def test_freeze(self):
+        f = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        data = f.full_data()
+        snapshot = f.freeze()
+        self.assertTrue(snapshot.frozen)
+        self.assertFalse(f.frozen)
+        self.assertIs(snapshot.freeze(), snapshot)
+        self.assertEqual(snapshot.content_hash(), f.content_hash())
+
+        f.get_single("SKLC").get_single("NAME").data = b"RENAMED\x00"
+        self.assertEqual(snapshot.full_data(), data)
+        with self.assertRaises(AttributeError):
+            snapshot.get_single("NAME").data = b"RENAMED\x00"
+        with self.assertRaises(AttributeError):
+            snapshot.form_type = "TEST"
+
+    def test_freeze_lazy(self):
+        data_file = os.path.join("test", "bin", "forms", "OBJT.bin")
+        with open(data_file, "rb") as f:
+            data = f.read()
+        lazy = compile.Form().load_from_file(data_file, lazy=True)
+        snapshot = lazy.freeze()
+        draft = lazy.thaw()
+        lazy.close()  # Neither copy may keep the file mapped
+        self.assertEqual(snapshot.full_data(), data)
+        self.assertEqual(draft.full_data(), data)
+        self.assertEqual(lazy.full_data(), data)
+
+    def test_thaw(self):
+        snapshot = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin")).freeze()
+        data = snapshot.full_data()
+        draft = snapshot.thaw()
+        self.assertFalse(draft.frozen)
+        self.assertIs(draft.sub_chunks[0], snapshot.sub_chunks[0])
+
+        base = draft.thaw_child(1)
+        self.assertEqual(base.form_type, "BASE")
+        self.assertIsNot(base, snapshot.sub_chunks[1])
+        base.add_chunk(compile.Chunk("TEST"))
+        self.assertEqual(snapshot.full_data(), data)
+        self.assertNotEqual(draft.size(), snapshot.size())
+
+        edited = draft.freeze()
+        self.assertIs(edited.sub_chunks[0], snapshot.sub_chunks[0])
+        self.assertIs(edited.sub_chunks[1].sub_chunks[0], snapshot.sub_chunks[1].sub_chunks[0])
+        self.assertEqual(edited.full_data(), compile.Form().parse_buffer(edited.full_data())[0].full_data())
+
     def test_add_chunk(self):
         c1 = compile.Chunk()
         c2 = compile.Chunk()
@@ -318,6 +756,305 @@ class TestClasses(unittest.TestCase):
     def test_todo(self):
         pass
 
+    def test_verification(self):
+        mismatches = []
+        v = compile.RoundTripVerifier("full", callback=lambda *args: mismatches.append(args))
+        compile.Clid().set_binary_data(b"base.class\x00", v)
+        compile.Clid().set_binary_data(b"base.class\x01", v)  # Decodes to base.class\x00
+        self.assertEqual((v.decoded, v.checked, v.mismatches), (2, 2, 1))
+        self.assertEqual(mismatches[0][1:], (b"base.class\x01", b"base.class\x00"))
+
+        v = compile.RoundTripVerifier("sample", sample_rate=2)
+        chunk = compile.Chunk("CLID")
+        chunk.data = b"base.class\x00"
+        for i in range(5):
+            compile.Clid().set_binary_data(b"base.class\x00", v)
+            chunk.to_class(verifier=v)
+        self.assertEqual((v.decoded, v.checked, v.mismatches), (10, 5, 0))
+
+        v = compile.RoundTripVerifier("off")
+        decoded = compile.round_trip.decoded
+        compile.Clid().set_binary_data(b"base.class\x01", v)
+        self.assertEqual((v.decoded, v.checked, v.mismatches), (1, 0, 0))
+        self.assertEqual(compile.round_trip.decoded, decoded)
+
+        with self.assertRaises(ValueError):
+            compile.RoundTripVerifier("sometimes")
+
+    def test_poo2_array(self):
+        poo2 = compile.Poo2()
+        data = struct.pack(">6f", 1.5, -3.0, 300.0, 0.0, 150.0, -1.0)
+        poo2.set_binary_data(data)
+        self.assertEqual(poo2.array.shape, (2, 3))
+        self.assertEqual(poo2.points, [{"x": 1.5, "y": -3.0, "z": 300.0}, {"x": 0.0, "y": 150.0, "z": -1.0}])
+        self.assertEqual(poo2.get_data(), data)
+
+        # In place edits of points are picked up like before, also after the chunk was encoded in between
+        points = poo2.points
+        self.assertEqual(poo2.size(), len(data))
+        poo2.content_hash()
+        points[0]["x"] = 2.5
+        self.assertEqual(poo2.get_data()[:4], struct.pack(">f", 2.5))
+        self.assertEqual(poo2.points_as_list()[0][0], 2.5)
+
+        # So are in place edits of a decoded array
+        decoded = compile.Poo2()
+        decoded.set_binary_data(data)
+        decoded.array[0, 0] = 5.0
+        self.assertEqual(decoded.get_data()[:4], struct.pack(">f", 5.0))
+
+        poo2.scale_down(150)
+        poo2.change_coordinate_system()
+        self.assertEqual(poo2.points_as_list()[0][1], -2.0)
+        self.assertEqual(poo2.points_as_list()[1][1], poo2.dtype.type(1 / 150))
+        self.assertEqual([list(v) for v in poo2.points_as_vectors()], poo2.points_as_list())
+        self.assertEqual(compile.Sen2().from_json(poo2.to_dict()).get_data(), poo2.get_data())
+
+    def test_pol2_arrays(self):
+        pol2 = compile.Pol2()
+        data = struct.pack(">IH3HH4H", 2, 3, 0, 1, 2, 4, 2, 3, 4, 5)
+        pol2.set_binary_data(data)
+        self.assertEqual(pol2.offsets.tolist(), [0, 3, 7])
+        self.assertEqual(pol2.indices.tolist(), [0, 1, 2, 2, 3, 4, 5])
+        self.assertEqual(pol2.edges, [[0, 1, 2], [2, 3, 4, 5]])
+        self.assertEqual(pol2.get_data(), data)
+
+        pol2.edges[0].append(6)
+        pol2.mark_dirty()
+        self.assertEqual(pol2.offsets.tolist(), [0, 4, 8])
+        self.assertEqual(compile.Pol2().from_json(pol2.to_dict()).get_data(), pol2.get_data())
+
+        with self.assertRaises(ValueError):
+            pol2.set_binary_data(data[:-2])
+        pol2.edges = [list(range(compile.GFX_MAX_VERTEX + 1))]
+        with self.assertRaises(ValueError):
+            pol2.get_data()
+
+    def test_olpl_arrays(self):
+        olpl = compile.Olpl()
+        data = struct.pack(">H6BH4B", 3, 0, 255, 128, 0, 255, 255, 2, 1, 2, 3, 4)
+        olpl.set_binary_data(data)
+        self.assertEqual(olpl.offsets.tolist(), [0, 3, 5])
+        self.assertEqual(olpl.points, [[[0, 255], [128, 0], [255, 255]], [[1, 2], [3, 4]]])
+        self.assertEqual(olpl.get_data(), data)
+
+        uv = olpl.normalized_uv()
+        self.assertEqual(uv.dtype, compile.numpy.float32)
+        self.assertEqual(uv[:3].tolist(), [[0.0, 0.0], [0.5, 255 / 256], [255 / 256, 0.0]])
+        self.assertEqual(olpl.normalized_points()[1], [[1 / 256, 253 / 256], [3 / 256, 251 / 256]])
+        self.assertEqual(olpl.as_floats()[1], [[1 / 255, 2 / 255], [3 / 255, 4 / 255]])
+        self.assertEqual(olpl.get_data(), data)
+
+        olpl.points[1].append([5, 6])
+        olpl.mark_dirty()
+        self.assertEqual(compile.Olpl().from_json(olpl.to_dict()).uv[-1].tolist(), [5, 6])
+        with self.assertRaises(ValueError):
+            olpl.set_binary_data(data[:-2])
+
+        olpl.set_binary_data(data)
+        normalized_points = olpl.normalized_points()
+        olpl.normalize()
+        self.assertEqual(olpl.points, normalized_points)
+
+        otl2 = compile.Otl2()
+        otl2.set_binary_data(b"\x01\x02\x03\x04")
+        self.assertEqual(otl2.points, [[1, 2], [3, 4]])
+        self.assertEqual(otl2.uv.shape, (2, 2))
+        self.assertEqual(otl2.get_data(), b"\x01\x02\x03\x04")
+
+    def test_atts_entries(self):
+        atts = compile.Atts()
+        data = struct.pack(">hBBBBhBBBB", 0, 1, 2, 3, 0, 5, 6, 7, 8, 0)
+        atts.set_binary_data(data)
+        self.assertEqual(atts.atts_entries, [compile.Atts.atts_entry(0, 1, 2, 3, 0),
+                                             compile.Atts.atts_entry(5, 6, 7, 8, 0)])
+        self.assertEqual(atts.poly_ids().tolist(), [0, 5])
+        self.assertEqual(atts.polys_without_atts(7).tolist(), [1, 2, 3, 4, 6])
+        self.assertEqual(atts.get_data(), data)
+
+        atts.atts_entries[1]["color_val"] = 9
+        atts.mark_dirty()
+        self.assertEqual(atts.entries["color_val"].tolist(), [1, 9])
+        self.assertEqual(compile.Atts().from_json(atts.to_dict()).get_data(), atts.get_data())
+
+    def test_atts_particle(self):
+        data = struct.pack(">hfffffffffffflllllllllll", 1, *range(13), *range(10))
+        atts = compile.Atts()
+        atts.set_binary_data(data)
+        self.assertTrue(atts.is_particle_atts)
+        self.assertEqual(atts.collide, 12.0)
+        self.assertEqual(atts.noise, 9)
+        self.assertEqual(atts.get_data(), data)
+        self.assertEqual(compile.Atts().from_json(atts.to_dict()).get_data(), data)
+
+    def test_data_vanm(self):
+        square = [[1, 2], [3, 4], [5, 6], [7, 8]]
+        data = compile.Data()
+        data.class_id = "ilbm.class"
+        data.frames = [{"frame_time": 80, "vbmp_name": "FX1.ILBM", "vbmp_coords": square},
+                       {"frame_time": 40, "vbmp_name": "FX2.ILBM", "vbmp_coords": [[9, 9], [9, 10], [10, 10]]},
+                       {"frame_time": 80, "vbmp_name": "FX1.ILBM", "vbmp_coords": [list(xy) for xy in square]}]
+        binary_data = data.get_data()
+        self.assertEqual(binary_data,
+                         b"\x00\x0bilbm.class\x00" +
+                         b"\x00\x13FX1.ILBM\x00FX2.ILBM\x00\x00" +
+                         b"\x00\x09\x00\x04\x01\x02\x03\x04\x05\x06\x07\x08\x00\x03\x09\x09\x09\x0a\x0a\x0a" +
+                         b"\x00\x03" +
+                         b"\x00\x00\x00\x50\x00\x00\x00\x00" +
+                         b"\x00\x00\x00\x28\x00\x01\x00\x01" +
+                         b"\x00\x00\x00\x50\x00\x00\x00\x00")
+
+        decoded = compile.Data()
+        v = compile.RoundTripVerifier("full")
+        decoded.set_binary_data(binary_data, v)
+        self.assertEqual(decoded.to_dict(), data.to_dict())
+        self.assertEqual((v.decoded, v.checked, v.mismatches), (1, 1, 0))
+
+    def test_strc_columns(self):
+        for name in ("KIDS", "PTCL"):
+            form = compile.Form().load_from_file(os.path.join("test", "bin", "forms", name + ".bin"))
+            for strc_type, columns in compile.strc_columns(form).items():
+                for row, chunk in enumerate(columns["chunks"]):
+                    strc = chunk.to_class()
+                    self.assertEqual(strc.strc_type, strc_type)
+                    for field in columns:
+                        if field != "chunks":
+                            expected = columns[field][row]
+                            self.assertEqual(getattr(strc, field),
+                                             expected.tolist() if hasattr(expected, "tolist") else expected)
+
+        with self.assertRaises(ValueError):
+            compile.Strc().set_binary_data(b"\x00\x02" + bytes(8))
+
+    def test_float32_json(self):
+        poo2 = compile.Poo2()
+        poo2.set_binary_data(struct.pack(">3f", 0.3, -1.0, 1 / 3))
+        points = poo2.to_dict()["POO2"]["points"]
+        self.assertEqual(points, [{"x": 0.3, "y": -1.0, "z": 0.33333334}])
+        self.assertEqual(compile.Form().from_json(poo2.to_json()).get_data(), poo2.get_data())
+
+        strc = compile.Strc()
+        binary_data = struct.pack(">h9f8h2i", 0, 0.1, 2.0, 3.0, 0.0, 0.0, 0.0, 1.5, 1.5, 0.7, *range(8), 0, 0)
+        strc.set_binary_data(binary_data)
+        self.assertEqual(strc.to_dict()["STRC"]["pos"], [0.1, 2.0, 3.0])
+        self.assertEqual(compile.Chunk().from_json(strc.to_dict()).get_data(), binary_data)
+
+        # Large whole floats are not exact either
+        self.assertEqual(compile.float32_tolist([3.4e38, -16777216.0, 16777215.0]), [3.4e38, -16777216.0, 16777215.0])
+        binary_data = struct.pack(">h9f8h2i", 0, 3.4e38, 2.0, 3.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, *range(8), 0, 0)
+        strc.set_binary_data(binary_data)
+        self.assertEqual(strc.to_dict()["STRC"]["pos"], [3.4e38, 2.0, 3.0])
+        self.assertEqual(compile.Chunk().from_json(strc.to_json()).get_data(), binary_data)
+
+    def test_json_version_2(self):
+        import glob
+        nodes = [compile.Form().load_from_file(file_name) for file_name in glob.glob("test/bin/forms/*.bin")]
+        nodes += [compile.Chunk().load_from_file(file_name) for file_name in glob.glob("test/bin/chunks/*.bin")]
+        for node in nodes:
+            json_v1 = node.to_json()
+            json_v2 = node.to_json(version=2)
+            self.assertEqual(compile.Form().from_json(json_v2).full_data(), compile.Form().from_json(json_v1).full_data())
+
+        poo2 = compile.Poo2()
+        poo2.set_binary_data(struct.pack(">6f", 1, 2, 3, 4, 5, 6))
+        self.assertEqual(poo2.to_json(version=2), '{\n  "POO2": {\n    "xyz": [ 1.0, 2.0, 3.0, 4.0, 5.0, 6.0 ]\n  }\n}')
+        self.assertEqual(poo2.to_dict(2), {"POO2": {"xyz": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]}})
+
+        # The version is passed along, not set for the module, so threads writing both layouts don't interfere
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            versions = [1, 2] * 50
+            for version, j in zip(versions, executor.map(lambda v: poo2.to_dict(v)["POO2"], versions)):
+                self.assertEqual("xyz" in j, version == 2)
+
+        data = compile.Data()
+        data.frames = [{"frame_time": 80, "vbmp_name": "FX2.ILBM", "vbmp_coords": [[1, 2], [3, 4]]},
+                       {"frame_time": 40, "vbmp_name": "FX2.ILBM", "vbmp_coords": [[5, 6]]},
+                       {"frame_time": 80, "vbmp_name": "FX3.ILBM", "vbmp_coords": [[1, 2], [3, 4]]}]
+        tables = data.tables
+        self.assertEqual(tables, {"vbmp_names": ["FX2.ILBM", "FX3.ILBM"], "polygons": [[1, 2, 3, 4], [5, 6]],
+                                  "frame_time": [80, 40, 80], "vbmp_name": [0, 0, 1], "polygon": [0, 1, 0]})
+        from_tables = compile.Data()
+        from_tables.tables = tables
+        self.assertEqual(from_tables.get_data(), data.get_data())
+        self.assertEqual(from_tables.frames, data.frames)
+
+        with self.assertRaises(ValueError):
+            poo2.to_json(version=3)
+
+    def test_schema_chunks(self):
+        for cls in compile.schema_chunk_classes:
+            self.assertIs(compile.master_list[cls.schema.chunk_id], cls)
+
+        class Test(compile.SchemaChunk):
+            schema = compile.ChunkSchema("TEST", [compile.Fixed("a", "H"), compile.Fixed("b", "f", 1.0),
+                                                  compile.CString("label"), compile.Padding(b"\x00"),
+                                                  compile.Counted("lists", ">u2", count_fmt=">H")])
+        compile.schema_chunk_classes.remove(Test)
+
+        test = Test()
+        self.assertEqual((test.a, test.b, test.label), (0, 1.0, ""))
+        data = struct.pack(">Hf", 7, 2.5) + b"abc\x00\x00" + struct.pack(">6H", 2, 1, 5, 2, 6, 7)
+        test.set_binary_data(data)
+        self.assertEqual((test.a, test.b, test.label), (7, 2.5, "abc"))
+        self.assertEqual(test.lists[0].tolist(), [0, 1, 3])
+        self.assertEqual(test.lists[1].tolist(), [5, 6, 7])
+        self.assertEqual(test.get_data(), data)
+        self.assertEqual(list(test.to_dict()["TEST"]), ["a", "b", "label", "lists"])
+
+        head = compile.Head()
+        head.set_binary_data(struct.pack(">3H", 64, 32, 1))
+        self.assertEqual((head.width, head.height, head.flags), (64, 32, 1))
+        self.assertEqual(head.get_data(), struct.pack(">3H", 64, 32, 1))
+
+    def test_view(self):
+        f = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "OBJT.bin"))
+        data = f.full_data()
+        copy = f.get_single("STRC").to_class()
+        copy.pos[0] = 123.0
+        self.assertEqual(f.full_data(), data)
+        self.assertNotEqual(f.get_single("STRC").to_class().pos[0], 123.0)
+
+        chunk = f.get_single("NAME")
+        stats = compile.view_cache
+        stats.reset()
+        view = chunk.view()
+        self.assertIs(chunk.view(), view)
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertIsNot(chunk.to_class(), view)
+        self.assertIs(view.view(), view)
+        self.assertEqual(f.full_data(), data)
+        self.assertEqual(stats.write_backs, 0)
+
+        size = f.size()
+        view.name += "_RENAMED"
+        self.assertEqual(f.size(), size + 8)
+        self.assertEqual(chunk.get_data(), view.get_data())
+        self.assertEqual(compile.Form().parse_buffer(f.full_data())[0].get_single("NAME").to_class().name, view.name)
+        self.assertEqual(stats.write_backs, 1)
+
+        chunk.set_binary_data(b"NEW_NAME")
+        self.assertIsNot(chunk.view(), view)
+        self.assertEqual(chunk.view().name, "NEW_NAME")
+
+    def test_uv_mapping_keeps_olpl(self):
+        amsh = compile.Form().load_from_file(os.path.join("test", "bin", "forms", "AMSH.bin")).to_class()
+        olpl = amsh.get_single("OLPL")
+        data = olpl.get_data()
+        self.assertEqual(amsh.get_uv_mapping, amsh.get_uv_mapping)
+        self.assertEqual(olpl.get_data(), data)
+
+    def test_slots(self):
+        for cls in set(compile.master_list.values()) | {compile.Chunk, compile.Form}:
+            self.assertFalse(hasattr(cls(), "__dict__"), cls.__name__)
+
+        name = compile.Chunk().from_json({"NAME": {"name": "VP_XPILZ", "zero_terminated": False}})
+        self.assertEqual(name.get_data(), b"VP_XPILZ")
+        with self.assertRaisesRegex(ValueError, "'not_a_field'.*NAME"):
+            compile.Chunk().from_json({"NAME": {"name": "VP_XPILZ", "not_a_field": 1}})
+        with self.assertRaisesRegex(ValueError, "'_size'"):
+            compile.Name().from_json_generic({"NAME": {"name": "VP_XPILZ", "_size": 3}})
+
 
 class TestMain(unittest.TestCase):
 
@@ -326,6 +1063,35 @@ class TestMain(unittest.TestCase):
         compile.compile_single_files(set_number)
         compile.compile_set_bas(set_number)
 
+        compiled_set = compile.open_set(os.path.join("output", "set1_compiled.bas"))
+        self.assertEqual(len(compiled_set.names("vehicle")), len(compile.parse_visproto(set_number)))
+        vehicle = compile.Form().from_json_file(os.path.join("assets", "sets", "set1", "objects", "vehicles",
+                                                             "VP_XPILZ.bas.json"))
+        self.assertEqual(compiled_set.get_vehicle("VP_XPILZ").full_data(), vehicle.sub_chunks[0].full_data())
+        self.assertEqual(compiled_set.get_resource("Skeleton/S00H.sklt").form_type, "SKLT")
+        self.assertIsNone(compiled_set.get_vehicle("NOT_A_VEHICLE"))
+
+    def test_set_toc(self):
+        import shutil
+        import tempfile
+        from unittest import mock
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "set1_compiled.bas")
+            shutil.copy(os.path.join("test", "bin", "forms", "OBJT.bin"), file_name)
+            compile.write_set_toc(file_name)
+            with mock.patch.object(compile, "scan_set_toc", wraps=compile.scan_set_toc) as scan:
+                entries = compile.read_set_toc(file_name)
+                self.assertEqual(scan.call_count, 0)
+
+                # Same size, different contents
+                with open(file_name, "r+b") as f:
+                    f.seek(-1, os.SEEK_END)
+                    f.write(b"X")
+                stat = os.stat(file_name)
+                os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+                self.assertEqual(compile.read_set_toc(file_name), entries)
+                self.assertEqual(scan.call_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main()